@@ -2,44 +2,139 @@
 Configuration settings for the AI Sonar Issue Fixer.
 """
 import os
+import platform
+from dataclasses import dataclass, fields
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+@dataclass(frozen=True)
+class Config:
+    """
+    Immutable application configuration.
+
+    Each field is read from the environment variable of the same name, falling
+    back to the default below, and converted to the field's type.
+    """
+    # SonarQube Configuration
+    SONARQUBE_URL: str = "https://sonarqube.example.com"
+    SONARQUBE_TOKEN: str = ""
+    SONARQUBE_PROJECT_KEY: str = ""
+
+    # Git Configuration
+    GIT_REPO_URL: str = ""
+    GIT_USERNAME: str = ""
+    GIT_PASSWORD: str = ""
+    GIT_EMAIL: str = "ai-sonar-fixer@example.com"
+    GIT_NAME: str = "AI Sonar Fixer"
+    GIT_MASTER_BRANCH: str = "master"
+    GIT_CACHE_CLONE: bool = True  # keep a bare clone between runs; False for a shallow one-shot clone
+    GIT_SPARSE_CHECKOUT: bool = False  # only check out the directories of the issues' files
+
+    # Azure DevOps Configuration
+    AZURE_DEVOPS_ORG: str = ""
+    AZURE_DEVOPS_PROJECT: str = ""
+    AZURE_DEVOPS_TOKEN: str = ""
+    AZURE_DEVOPS_REPO_ID: str = ""
+
+    # Gemini AI Configuration
+    GEMINI_API_KEY: str = ""
+    GEMINI_MAX_CONCURRENCY: int = 4  # concurrent Gemini requests per process
+
+    # Jenkins Configuration
+    JENKINS_URL: str = ""
+    JENKINS_JOB_NAME: str = ""
+    JENKINS_USERNAME: str = ""
+    JENKINS_API_TOKEN: str = ""
+
+    # Application Configuration
+    LOG_LEVEL: str = "INFO"
+    TEMP_DIR: str = "/tmp/ai-sonar-fixer"
+    WORK_DIR: str = ""  # working trees; defaults to a tmpfs under /dev/shm on Linux, else TEMP_DIR
+    MAX_ISSUES_PER_RUN: int = 50
+    CONTEXT_LINES_BEFORE: int = 10
+    CONTEXT_LINES_AFTER: int = 10
+    RETRY_ATTEMPTS: int = 3
+    RETRY_DELAY: int = 5  # seconds
+    FIX_BATCH_SIZE: int = 5  # issues per batched LLM call
+    ONE_COMMIT_PER_ISSUE: bool = False  # commit each fix separately (fixes to the same file share one) instead of one commit per run
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        """
+        Build the configuration from environment variables.
+
+        Returns:
+            Config: Configuration instance
+        """
+        values = {}
+        for field in fields(cls):
+            raw_value = os.getenv(field.name)
+            if raw_value is None:
+                continue
+            if field.type is bool:
+                values[field.name] = raw_value.strip().lower() in ("1", "true", "yes", "on")
+            else:
+                values[field.name] = field.type(raw_value)
+        return cls(**values)
+
+# Parsed once at import time
+CONFIG = Config.from_env()
+
+def _default_work_dir() -> str:
+    """
+    Get the directory for working trees when WORK_DIR isn't set.
+
+    Working trees are kept in memory on Linux if /dev/shm is writable, so
+    fixes and commits don't wait on the disk; caches stay under TEMP_DIR.
+
+    Returns:
+        str: Directory for working trees
+    """
+    if platform.system() == "Linux" and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm/ai-sonar-fixer"
+    return CONFIG.TEMP_DIR
+
 # SonarQube Configuration
-SONARQUBE_URL = os.getenv("SONARQUBE_URL", "https://sonarqube.example.com")
-SONARQUBE_TOKEN = os.getenv("SONARQUBE_TOKEN", "")
-SONARQUBE_PROJECT_KEY = os.getenv("SONARQUBE_PROJECT_KEY", "")
+SONARQUBE_URL = CONFIG.SONARQUBE_URL
+SONARQUBE_TOKEN = CONFIG.SONARQUBE_TOKEN
+SONARQUBE_PROJECT_KEY = CONFIG.SONARQUBE_PROJECT_KEY
 
 # Git Configuration
-GIT_REPO_URL = os.getenv("GIT_REPO_URL", "")
-GIT_USERNAME = os.getenv("GIT_USERNAME", "")
-GIT_PASSWORD = os.getenv("GIT_PASSWORD", "")
-GIT_EMAIL = os.getenv("GIT_EMAIL", "ai-sonar-fixer@example.com")
-GIT_NAME = os.getenv("GIT_NAME", "AI Sonar Fixer")
-GIT_MASTER_BRANCH = os.getenv("GIT_MASTER_BRANCH", "master")
+GIT_REPO_URL = CONFIG.GIT_REPO_URL
+GIT_USERNAME = CONFIG.GIT_USERNAME
+GIT_PASSWORD = CONFIG.GIT_PASSWORD
+GIT_EMAIL = CONFIG.GIT_EMAIL
+GIT_NAME = CONFIG.GIT_NAME
+GIT_MASTER_BRANCH = CONFIG.GIT_MASTER_BRANCH
+GIT_CACHE_CLONE = CONFIG.GIT_CACHE_CLONE
+GIT_SPARSE_CHECKOUT = CONFIG.GIT_SPARSE_CHECKOUT
 
 # Azure DevOps Configuration
-AZURE_DEVOPS_ORG = os.getenv("AZURE_DEVOPS_ORG", "")
-AZURE_DEVOPS_PROJECT = os.getenv("AZURE_DEVOPS_PROJECT", "")
-AZURE_DEVOPS_TOKEN = os.getenv("AZURE_DEVOPS_TOKEN", "")
-AZURE_DEVOPS_REPO_ID = os.getenv("AZURE_DEVOPS_REPO_ID", "")
+AZURE_DEVOPS_ORG = CONFIG.AZURE_DEVOPS_ORG
+AZURE_DEVOPS_PROJECT = CONFIG.AZURE_DEVOPS_PROJECT
+AZURE_DEVOPS_TOKEN = CONFIG.AZURE_DEVOPS_TOKEN
+AZURE_DEVOPS_REPO_ID = CONFIG.AZURE_DEVOPS_REPO_ID
 
 # Gemini AI Configuration
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+GEMINI_API_KEY = CONFIG.GEMINI_API_KEY
+GEMINI_MAX_CONCURRENCY = CONFIG.GEMINI_MAX_CONCURRENCY
 
 # Jenkins Configuration
-JENKINS_URL = os.getenv("JENKINS_URL", "")
-JENKINS_JOB_NAME = os.getenv("JENKINS_JOB_NAME", "")
-JENKINS_USERNAME = os.getenv("JENKINS_USERNAME", "")
-JENKINS_API_TOKEN = os.getenv("JENKINS_API_TOKEN", "")
+JENKINS_URL = CONFIG.JENKINS_URL
+JENKINS_JOB_NAME = CONFIG.JENKINS_JOB_NAME
+JENKINS_USERNAME = CONFIG.JENKINS_USERNAME
+JENKINS_API_TOKEN = CONFIG.JENKINS_API_TOKEN
 
 # Application Configuration
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-TEMP_DIR = os.getenv("TEMP_DIR", "/tmp/ai-sonar-fixer")
-MAX_ISSUES_PER_RUN = int(os.getenv("MAX_ISSUES_PER_RUN", "50"))
-CONTEXT_LINES_BEFORE = int(os.getenv("CONTEXT_LINES_BEFORE", "10"))
-CONTEXT_LINES_AFTER = int(os.getenv("CONTEXT_LINES_AFTER", "10"))
-RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
-RETRY_DELAY = int(os.getenv("RETRY_DELAY", "5"))  # seconds
+LOG_LEVEL = CONFIG.LOG_LEVEL
+TEMP_DIR = CONFIG.TEMP_DIR
+WORK_DIR = CONFIG.WORK_DIR or _default_work_dir()
+MAX_ISSUES_PER_RUN = CONFIG.MAX_ISSUES_PER_RUN
+CONTEXT_LINES_BEFORE = CONFIG.CONTEXT_LINES_BEFORE
+CONTEXT_LINES_AFTER = CONFIG.CONTEXT_LINES_AFTER
+RETRY_ATTEMPTS = CONFIG.RETRY_ATTEMPTS
+RETRY_DELAY = CONFIG.RETRY_DELAY
+FIX_BATCH_SIZE = CONFIG.FIX_BATCH_SIZE
+ONE_COMMIT_PER_ISSUE = CONFIG.ONE_COMMIT_PER_ISSUE
@@ -4,18 +4,14 @@ Script to run the AI Sonar Issue Fixer dashboard.
 """
 import os
 import sys
-from src.dashboard.app import run_dashboard
+import importlib.util
 from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
 def check_streamlit_installed():
-    """Check if Streamlit is installed."""
-    try:
-        import streamlit
-        return True
-    except ImportError:
-        return False
+    """Check if Streamlit is installed without importing it."""
+    return importlib.util.find_spec("streamlit") is not None
 
 if __name__ == "__main__":
     try:
@@ -26,6 +22,9 @@ if __name__ == "__main__":
             sys.exit(1)
 
         logger.info("Starting AI Sonar Issue Fixer dashboard")
+
+        # Importing the app pulls in Streamlit, pandas and plotly
+        from src.dashboard.app import run_dashboard
         run_dashboard()
     except Exception as e:
         logger.error(f"Error running dashboard: {str(e)}")
@@ -1,70 +1,43 @@
 """
 Code Fixer Agent for fixing code issues identified by SonarQube.
 """
-from typing import Dict, List, Any, TypedDict, Optional
-from langchain.prompts import PromptTemplate
-from langchain.llms import GoogleGenerativeAI
-from pydantic import BaseModel, Field
-from config import GEMINI_API_KEY
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, TypedDict, Optional, Tuple
+from dataclasses import dataclass, field
+from config import GEMINI_API_KEY, FIX_BATCH_SIZE
 from src.utils.logger import setup_logger
+from src.utils.llm import get_llm
+from src.utils.prompt import CompiledPrompt
+from src.utils.llm_cache import cached_invoke, acached_invoke
+from src.utils.file_patch import replace_lines, replace_line_ranges
+from src.utils.json_utils import extract_json
+from src.utils.metrics import timed
 from src.utils.memory import AgentMemory, FixMemory
 from src.utils.feedback import FeedbackManager, FeedbackItem
 from src.agents.issue_analyzer import IssueAnalysisOutput
 
 logger = setup_logger()
 
-class CodeFixInput(BaseModel):
-    """Input for the code fixer agent."""
-    analysis: IssueAnalysisOutput = Field(..., description="Analysis of the issue")
-    use_memory: bool = Field(True, description="Whether to use memory for fixing")
-
-class CodeFixOutput(BaseModel):
-    """Output from the code fixer agent."""
-    issue_key: str = Field(..., description="SonarQube issue key")
-    rule: str = Field(..., description="SonarQube rule ID")
-    message: str = Field(..., description="Issue message")
-    file_path: str = Field(..., description="Path to the file containing the issue")
-    fixed_code: str = Field(..., description="Fixed code")
-    original_code: Optional[str] = Field(None, description="Original code before fix")
-    explanation: str = Field(..., description="Explanation of the fix")
-    confidence: float = Field(..., description="Confidence in the fix (0-1)")
-    used_memory: bool = Field(False, description="Whether memory was used for the fix")
-    similar_fixes: List[Dict[str, Any]] = Field(default_factory=list, description="Similar fixes from memory")
-    feedback: Optional[FeedbackItem] = Field(None, description="Automated feedback on the fix")
-
-class CodeFixerAgent:
-    """
-    Agent for fixing code issues identified by SonarQube.
-    """
-
-    def __init__(self, memory_file: str = "agent_memory.json", feedback_file: str = "feedback.json"):
-        """Initialize the code fixer agent."""
-        self.api_key = GEMINI_API_KEY
-
-        # Validate configuration
-        if not self.api_key:
-            logger.error("Gemini API key not configured")
-            raise ValueError("Gemini API key not configured")
-
-        # Initialize the LLM
-        self.llm = GoogleGenerativeAI(
-            model="gemini-pro",
-            google_api_key=self.api_key,
-            temperature=0.2,
-            top_p=0.95,
-            max_output_tokens=2048
-        )
-
-        # Initialize memory
-        self.memory = AgentMemory(memory_file=memory_file)
-
-        # Initialize feedback manager
-        self.feedback_manager = FeedbackManager(feedback_file=feedback_file, memory=self.memory)
-
-        # Create the memory-enhanced prompt template
-        self.memory_prompt_template = PromptTemplate(
-            input_variables=["rule", "message", "file", "line", "code_context", "analysis", "fix_strategy", "similar_fixes"],
-            template="""
+# Fixes below this confidence skip automated feedback and are not remembered
+MIN_FEEDBACK_CONFIDENCE = 0.3
+
+# Lines of code kept from each similar fix, and the prompt size (in characters)
+# above which the least similar fixes are dropped
+MAX_SIMILAR_FIX_LINES = 30
+MAX_PROMPT_CHARS = 12 * 1024
+
+def _truncate_code(code: Optional[str]) -> str:
+    """Keep the first MAX_SIMILAR_FIX_LINES lines of a code snippet."""
+    if not code:
+        return ""
+    lines = code.splitlines()
+    if len(lines) <= MAX_SIMILAR_FIX_LINES:
+        return code
+    return "\n".join(lines[:MAX_SIMILAR_FIX_LINES])
+
+# Memory-enhanced prompt, used when similar fixes are found in memory
+MEMORY_PROMPT = CompiledPrompt("""
 You are an expert code fixer specializing in fixing SonarQube issues. Your task is to fix the following issue:
 
 1. **Issue Information**:
@@ -104,13 +77,10 @@ Return your fix in the following JSON format:
 ```
 
 The confidence should be a number between 0 and 1 indicating how confident you are in the fix.
-"""
-        )
+""")
 
-        # Create the standard prompt template
-        self.prompt_template = PromptTemplate(
-            input_variables=["rule", "message", "file", "line", "code_context", "analysis", "fix_strategy"],
-            template="""
+# Standard prompt, used when no similar fixes are available
+FIX_PROMPT = CompiledPrompt("""
 You are an expert code fixer specializing in fixing SonarQube issues. Your task is to fix the following issue:
 
 1. **Issue Information**:
@@ -145,13 +115,140 @@ Return your fix in the following JSON format:
 ```
 
 The confidence should be a number between 0 and 1 indicating how confident you are in the fix.
-"""
+""")
+
+# Batch prompt for fixing several issues of the same rule at once
+BATCH_FIX_PROMPT = CompiledPrompt("""
+You are an expert code fixer specializing in fixing SonarQube issues. Your task is to fix each of the following issues:
+
+1. **Issues**:
+The issues below are provided as a JSON list. Each entry contains the SonarQube rule, the issue message,
+the affected file and line, the code context, an analysis of the issue, a fix strategy and, optionally,
+similar fixes from memory.
+```json
+{issues_json}
+```
+
+2. **Fix Task**:
+   - Fix each issue independently; the code context of one issue must not leak into another
+   - Make minimal changes to the code
+   - Ensure the fixes follow best practices
+   - Preserve the original code style and formatting
+   - Learn from the similar fixes provided
+
+3. **Return Format**:
+Return one fix per issue in the following JSON format:
+```json
+{{
+  "fixes": [
+    {{
+      "issue_key": "The issue_key of the issue being fixed",
+      "fixed_code": "The complete fixed code that should replace the provided code context",
+      "explanation": "Explanation of the changes made",
+      "confidence": 0.95
+    }}
+  ]
+}}
+```
+
+The confidence should be a number between 0 and 1 indicating how confident you are in each fix.
+""")
+
+@dataclass
+class CodeFixInput:
+    """Input for the code fixer agent."""
+    analysis: IssueAnalysisOutput  # Analysis of the issue
+    use_memory: bool = True  # Whether to use memory for fixing
+
+@dataclass
+class CodeFixOutput:
+    """Output from the code fixer agent."""
+    issue_key: str  # SonarQube issue key
+    rule: str  # SonarQube rule ID
+    message: str  # Issue message
+    file_path: str  # Path to the file containing the issue
+    fixed_code: str  # Fixed code
+    explanation: str  # Explanation of the fix
+    confidence: float  # Confidence in the fix (0-1)
+    original_code: Optional[str] = None  # Original code before fix
+    used_memory: bool = False  # Whether memory was used for the fix
+    similar_fixes: List[Dict[str, Any]] = field(default_factory=list)  # Similar fixes from memory
+    feedback: Optional[FeedbackItem] = None  # Automated feedback on the fix
+    processing_time: Optional[float] = None  # Seconds spent analyzing and fixing the issue
+
+@dataclass(frozen=True)
+class FixResponse:
+    """Fix returned by the LLM for a single issue."""
+    fixed_code: str = ""
+    explanation: str = "Explanation not available"
+    confidence: float = 0.5
+    memory_usage: str = ""
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "FixResponse":
+        """
+        Build a fix response from decoded JSON.
+
+        Args:
+            data: Decoded JSON object
+
+        Returns:
+            Fix response, with defaults for missing fields
+
+        Raises:
+            ValueError: If the confidence is not a number
+        """
+        return cls(
+            fixed_code=str(data.get("fixed_code", cls.fixed_code)),
+            explanation=str(data.get("explanation", cls.explanation)),
+            confidence=float(data.get("confidence", cls.confidence)),
+            memory_usage=str(data.get("memory_usage", cls.memory_usage))
         )
 
+class CodeFixerAgent:
+    """
+    Agent for fixing code issues identified by SonarQube.
+    """
+
+    def __init__(self, memory_file: str = "agent_memory.jsonl", feedback_file: str = "feedback.jsonl"):
+        """Initialize the code fixer agent."""
+        self.api_key = GEMINI_API_KEY
+
+        # Validate configuration
+        if not self.api_key:
+            logger.error("Gemini API key not configured")
+            raise ValueError("Gemini API key not configured")
+
+        # Use the shared LLM client
+        self.llm = get_llm()
+
+        # Initialize memory
+        self.memory = AgentMemory(memory_file=memory_file)
+
+        # Initialize feedback manager
+        self.feedback_manager = FeedbackManager(feedback_file=feedback_file, memory=self.memory)
+
+        # Prompt templates are compiled once at import time
+        self.memory_prompt_template = MEMORY_PROMPT
+        self.prompt_template = FIX_PROMPT
+        self.batch_prompt_template = BATCH_FIX_PROMPT
+
     def fix_issue(self, input_data: CodeFixInput) -> CodeFixOutput:
         """
         Fix a SonarQube issue.
 
+        Args:
+            input_data: Input data containing the issue analysis
+
+        Returns:
+            Fix output
+        """
+        return self._fix_single(input_data)
+
+    async def fix_issue_async(self, input_data: CodeFixInput) -> CodeFixOutput:
+        """
+        Fix a SonarQube issue without blocking the event loop on the LLM call.
+
         Args:
             input_data: Input data containing the issue analysis
 
@@ -159,72 +256,199 @@ The confidence should be a number between 0 and 1 indicating how confident you a
             Fix output
         """
         analysis = input_data.analysis
+        prompt, original_code, used_memory, similar_fixes = self._prepare_single_fix(input_data)
+
+        # Generate the fix
+        logger.info(f"Fixing issue {analysis.issue_key} using Gemini" + (" with memory" if used_memory else ""))
+        with timed("fix.llm_invoke"):
+            fix_text = await acached_invoke(self.llm, prompt, namespace="code_fix_v1")
+
+        return self._parse_single_fix(analysis, original_code, fix_text, used_memory, similar_fixes)
+
+    def fix_issues_batch(
+        self,
+        inputs: List[CodeFixInput],
+        batch_size: int = FIX_BATCH_SIZE,
+        group_by: str = "rule",
+        max_workers: int = 1
+    ) -> List[Optional[CodeFixOutput]]:
+        """
+        Fix multiple SonarQube issues, packing related issues into a single LLM call.
+
+        If a batched call fails, its issues are retried individually, so one
+        failing call only loses the issues it could not fix.
+
+        Args:
+            inputs: Input data for each issue to fix
+            batch_size: Maximum number of issues to send in one prompt
+            group_by: Analysis field whose value issues must share to be batched ("rule" or "file_path")
+            max_workers: Number of batches sent to the LLM concurrently
+
+        Returns:
+            Fix outputs in the same order as the inputs, None for issues that could not be fixed
+        """
+        # Group related issues so each prompt covers a single family of fixes
+        groups: Dict[str, List[int]] = {}
+        for index, input_data in enumerate(inputs):
+            groups.setdefault(getattr(input_data.analysis, group_by), []).append(index)
+
+        size = max(1, batch_size)
+        chunks = [
+            (label, indices[start:start + size])
+            for label, indices in groups.items()
+            for start in range(0, len(indices), size)
+        ]
+
+        def _fix_chunk(label: str, chunk: List[int]) -> List[Optional[CodeFixOutput]]:
+            if len(chunk) == 1:
+                return [self._try_fix_single(inputs[chunk[0]])]
+            try:
+                return self._fix_group(label, [inputs[i] for i in chunk])
+            except Exception as e:
+                logger.error(f"Error fixing batch for {label}, fixing its issues individually: {str(e)}")
+                return [self._try_fix_single(inputs[i]) for i in chunk]
+
+        if max_workers > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(lambda item: _fix_chunk(*item), chunks))
+        else:
+            results = [_fix_chunk(label, chunk) for label, chunk in chunks]
+
+        outputs: List[Optional[CodeFixOutput]] = [None] * len(inputs)
+        for (_, chunk), chunk_outputs in zip(chunks, results):
+            for index, output in zip(chunk, chunk_outputs):
+                outputs[index] = output
+
+        return outputs
+
+    def _get_similar_fixes(self, analysis: IssueAnalysisOutput) -> List[FixMemory]:
+        """
+        Look up similar fixes from memory for an analyzed issue.
+
+        Args:
+            analysis: Analysis of the issue
+
+        Returns:
+            List of similar fixes
+        """
+        memory_fixes = self.memory.get_similar_fixes(
+            issue_key=analysis.issue_key,
+            rule=analysis.rule,
+            message=analysis.message
+        )
+
+        if memory_fixes:
+            logger.info(f"Found {len(memory_fixes)} similar fixes in memory for issue {analysis.issue_key}")
+        else:
+            logger.info(f"No similar fixes found in memory for issue {analysis.issue_key}")
+
+        return memory_fixes
+
+    def _fix_single(self, input_data: CodeFixInput) -> CodeFixOutput:
+        """
+        Fix a single SonarQube issue with its own LLM call.
+
+        Args:
+            input_data: Input data containing the issue analysis
+
+        Returns:
+            Fix output
+        """
+        analysis = input_data.analysis
+        prompt, original_code, used_memory, similar_fixes = self._prepare_single_fix(input_data)
+
+        # Generate the fix
+        logger.info(f"Fixing issue {analysis.issue_key} using Gemini" + (" with memory" if used_memory else ""))
+        with timed("fix.llm_invoke"):
+            fix_text = cached_invoke(self.llm, prompt, namespace="code_fix_v1")
+
+        return self._parse_single_fix(analysis, original_code, fix_text, used_memory, similar_fixes)
+
+    def _try_fix_single(self, input_data: CodeFixInput) -> Optional[CodeFixOutput]:
+        """
+        Fix a single SonarQube issue, logging instead of raising on failure.
+
+        Args:
+            input_data: Input data containing the issue analysis
+
+        Returns:
+            Fix output, or None if the issue could not be fixed
+        """
+        try:
+            return self._fix_single(input_data)
+        except Exception as e:
+            logger.error(f"Error fixing issue {input_data.analysis.issue_key}: {str(e)}")
+            return None
+
+    @timed("fix.prompt_format")
+    def _prepare_single_fix(self, input_data: CodeFixInput) -> Tuple[str, str, bool, List[Dict[str, Any]]]:
+        """
+        Look up similar fixes and format the prompt for a single issue.
+
+        Args:
+            input_data: Input data containing the issue analysis
+
+        Returns:
+            Tuple of the prompt, the original code, whether memory was used and the similar fixes
+        """
+        analysis = input_data.analysis
         use_memory = input_data.use_memory
         similar_fixes = []
         used_memory = False
-        memory_usage = ""
 
         # Get original code
         original_code = analysis.context['context_text']
 
         # Check if we should use memory
-        if use_memory:
-            # Get similar fixes from memory
-            memory_fixes = self.memory.get_similar_fixes(
-                issue_key=analysis.issue_key,
+        memory_fixes = self._get_similar_fixes(analysis) if use_memory else []
+
+        if memory_fixes:
+            used_memory = True
+
+            # Format similar fixes for the prompt, most similar first, with their code truncated
+            similar_fix_blocks = [
+                f"Similar Fix #{i+1}:\n"
+                f"Rule: {fix.rule}\n"
+                f"Message: {fix.message}\n"
+                f"Original Code:\n```\n{_truncate_code(fix.original_code)}\n```\n"
+                f"Fixed Code:\n```\n{_truncate_code(fix.fixed_code)}\n```\n"
+                f"Explanation: {fix.explanation}\n"
+                for i, fix in enumerate(memory_fixes)
+            ]
+
+            # Drop the least similar fixes while the prompt would be too long, keeping at least one
+            prompt_size = sum(len(literal) for literal in self.memory_prompt_template.literals)
+            prompt_size += len(original_code) + len(analysis.message) + len(analysis.analysis) + len(analysis.fix_strategy)
+            prompt_size += sum(len(block) + 1 for block in similar_fix_blocks)
+            while len(similar_fix_blocks) > 1 and prompt_size > MAX_PROMPT_CHARS:
+                prompt_size -= len(similar_fix_blocks.pop()) + 1
+            memory_fixes = memory_fixes[:len(similar_fix_blocks)]
+
+            similar_fixes_text = "\n".join(similar_fix_blocks) + "\n"
+
+            # Convert to dict for output
+            similar_fixes = [
+                {
+                    "rule": fix.rule,
+                    "message": fix.message,
+                    "original_code": fix.original_code,
+                    "fixed_code": fix.fixed_code,
+                    "explanation": fix.explanation
+                }
+                for fix in memory_fixes
+            ]
+
+            # Use memory-enhanced prompt
+            prompt = self.memory_prompt_template.format(
                 rule=analysis.rule,
-                message=analysis.message
+                message=analysis.message,
+                file=analysis.file_path,
+                line=analysis.line_number,
+                code_context=original_code,
+                analysis=analysis.analysis,
+                fix_strategy=analysis.fix_strategy,
+                similar_fixes=similar_fixes_text
             )
-
-            if memory_fixes:
-                used_memory = True
-                logger.info(f"Found {len(memory_fixes)} similar fixes in memory for issue {analysis.issue_key}")
-
-                # Format similar fixes for the prompt
-                similar_fixes_text = ""
-                for i, fix in enumerate(memory_fixes):
-                    similar_fixes_text += f"Similar Fix #{i+1}:\n"
-                    similar_fixes_text += f"Rule: {fix.rule}\n"
-                    similar_fixes_text += f"Message: {fix.message}\n"
-                    similar_fixes_text += f"Original Code:\n```\n{fix.original_code}\n```\n"
-                    similar_fixes_text += f"Fixed Code:\n```\n{fix.fixed_code}\n```\n"
-                    similar_fixes_text += f"Explanation: {fix.explanation}\n\n"
-
-                # Convert to dict for output
-                similar_fixes = [
-                    {
-                        "rule": fix.rule,
-                        "message": fix.message,
-                        "original_code": fix.original_code,
-                        "fixed_code": fix.fixed_code,
-                        "explanation": fix.explanation
-                    }
-                    for fix in memory_fixes
-                ]
-
-                # Use memory-enhanced prompt
-                prompt = self.memory_prompt_template.format(
-                    rule=analysis.rule,
-                    message=analysis.message,
-                    file=analysis.file_path,
-                    line=analysis.line_number,
-                    code_context=original_code,
-                    analysis=analysis.analysis,
-                    fix_strategy=analysis.fix_strategy,
-                    similar_fixes=similar_fixes_text
-                )
-            else:
-                # No similar fixes found, use standard prompt
-                logger.info(f"No similar fixes found in memory for issue {analysis.issue_key}")
-                prompt = self.prompt_template.format(
-                    rule=analysis.rule,
-                    message=analysis.message,
-                    file=analysis.file_path,
-                    line=analysis.line_number,
-                    code_context=original_code,
-                    analysis=analysis.analysis,
-                    fix_strategy=analysis.fix_strategy
-                )
         else:
             # Use standard prompt without memory
             prompt = self.prompt_template.format(
@@ -237,86 +461,231 @@ The confidence should be a number between 0 and 1 indicating how confident you a
                 fix_strategy=analysis.fix_strategy
             )
 
-        # Generate the fix
-        logger.info(f"Fixing issue {analysis.issue_key} using Gemini" + (" with memory" if used_memory else ""))
-        fix_text = self.llm.invoke(prompt)
+        return prompt, original_code, used_memory, similar_fixes
 
+    def _parse_single_fix(
+        self,
+        analysis: IssueAnalysisOutput,
+        original_code: str,
+        fix_text: str,
+        used_memory: bool,
+        similar_fixes: List[Dict[str, Any]]
+    ) -> CodeFixOutput:
+        """
+        Parse the LLM response for a single issue and build the output.
+
+        Args:
+            analysis: Analysis of the issue
+            original_code: Original code before the fix
+            fix_text: Raw LLM response
+            used_memory: Whether memory was used for the fix
+            similar_fixes: Similar fixes from memory
+
+        Returns:
+            Fix output
+        """
         # Parse the fix
         try:
             # Extract JSON from the response
-            import json
-            import re
+            with timed("fix.json_parse"):
+                fix_json = extract_json(fix_text)
 
-            # Find JSON in the response
-            json_match = re.search(r'```json\s*(.*?)\s*```', fix_text, re.DOTALL)
-            if json_match:
-                fix_json = json.loads(json_match.group(1))
+            if isinstance(fix_json, dict):
+                response = FixResponse.from_json(fix_json)
             else:
-                # Try to find JSON without the markdown code block
-                json_match = re.search(r'({.*})', fix_text, re.DOTALL)
-                if json_match:
-                    fix_json = json.loads(json_match.group(1))
-                else:
-                    logger.warning(f"Could not parse JSON from fix for issue {analysis.issue_key}")
-                    # If we can't parse JSON, assume the entire response is the fixed code
-                    fix_json = {
-                        "fixed_code": fix_text.strip(),
-                        "explanation": "Fix parsing failed, using raw response",
-                        "confidence": 0.5
-                    }
-
-            # Extract memory usage if available
-            if "memory_usage" in fix_json and used_memory:
-                memory_usage = fix_json["memory_usage"]
+                logger.warning(f"Could not parse JSON from fix for issue {analysis.issue_key}")
+                # If we can't parse JSON, assume the entire response is the fixed code
+                response = FixResponse(
+                    fixed_code=fix_text.strip(),
+                    explanation="Fix parsing failed, using raw response"
+                )
 
         except Exception as e:
             logger.error(f"Error parsing fix for issue {analysis.issue_key}: {str(e)}")
             # If we can't parse JSON, assume the entire response is the fixed code
-            fix_json = {
-                "fixed_code": fix_text.strip(),
-                "explanation": f"Fix parsing failed: {str(e)}",
-                "confidence": 0.5
+            response = FixResponse(
+                fixed_code=fix_text.strip(),
+                explanation=f"Fix parsing failed: {str(e)}"
+            )
+
+        return self._finalize_fix(analysis, original_code, response, used_memory, similar_fixes)
+
+    def _fix_group(self, label: str, group: List[CodeFixInput]) -> List[CodeFixOutput]:
+        """
+        Fix a group of related issues with a single LLM call.
+
+        Issues missing from the batched response are retried individually.
+
+        Args:
+            label: Rule ID or file path shared by the group, used for logging
+            group: Input data for each issue in the group
+
+        Returns:
+            Fix outputs in the same order as the group
+        """
+        issues_payload = []
+        similar_fixes_by_key: Dict[str, List[Dict[str, Any]]] = {}
+
+        for input_data in group:
+            analysis = input_data.analysis
+            memory_fixes = self._get_similar_fixes(analysis) if input_data.use_memory else []
+
+            similar_fixes = [
+                {
+                    "rule": fix.rule,
+                    "message": fix.message,
+                    "original_code": fix.original_code,
+                    "fixed_code": fix.fixed_code,
+                    "explanation": fix.explanation
+                }
+                for fix in memory_fixes
+            ]
+            similar_fixes_by_key[analysis.issue_key] = similar_fixes
+
+            issue_payload = {
+                "issue_key": analysis.issue_key,
+                "rule": analysis.rule,
+                "message": analysis.message,
+                "file": analysis.file_path,
+                "line": analysis.line_number,
+                "code_context": analysis.context['context_text'],
+                "analysis": analysis.analysis,
+                "fix_strategy": analysis.fix_strategy
             }
+            if similar_fixes:
+                issue_payload["similar_fixes"] = [
+                    dict(
+                        fix,
+                        original_code=_truncate_code(fix["original_code"]),
+                        fixed_code=_truncate_code(fix["fixed_code"])
+                    )
+                    for fix in similar_fixes
+                ]
+            issues_payload.append(issue_payload)
 
-        # Generate automated feedback
-        feedback = self.feedback_manager.process_automated_feedback(
-            issue_key=analysis.issue_key,
-            fixed_code=fix_json.get("fixed_code", ""),
-            original_code=original_code
+        prompt = self.batch_prompt_template.format(
+            issues_json=json.dumps(issues_payload, indent=2)
         )
 
+        # Generate all fixes in one call
+        logger.info(f"Fixing {len(group)} issues for {label} using Gemini in a single batch")
+        with timed("fix.llm_invoke"):
+            fix_text = cached_invoke(self.llm, prompt, namespace="code_fix_v1")
+
+        # Parse the fixes
+        fixes_by_key: Dict[str, FixResponse] = {}
+        try:
+            with timed("fix.json_parse"):
+                batch_json = extract_json(fix_text)
+
+            if batch_json is not None:
+                fixes = batch_json if isinstance(batch_json, list) else batch_json.get("fixes", [])
+                fixes_by_key = {
+                    fix["issue_key"]: FixResponse.from_json(fix)
+                    for fix in fixes
+                    if isinstance(fix, dict) and fix.get("issue_key")
+                }
+            else:
+                logger.warning(f"Could not parse JSON from batched fix for {label}")
+
+        except Exception as e:
+            logger.error(f"Error parsing batched fix for {label}: {str(e)}")
+
+        outputs = []
+        for input_data in group:
+            analysis = input_data.analysis
+            response = fixes_by_key.get(analysis.issue_key)
+
+            if response is None:
+                logger.warning(f"No fix for issue {analysis.issue_key} in batched response, fixing it individually")
+                outputs.append(self._fix_single(input_data))
+                continue
+
+            similar_fixes = similar_fixes_by_key[analysis.issue_key]
+            outputs.append(self._finalize_fix(
+                analysis,
+                analysis.context['context_text'],
+                response,
+                bool(similar_fixes),
+                similar_fixes
+            ))
+
+        return outputs
+
+    def _finalize_fix(
+        self,
+        analysis: IssueAnalysisOutput,
+        original_code: str,
+        response: FixResponse,
+        used_memory: bool,
+        similar_fixes: List[Dict[str, Any]]
+    ) -> CodeFixOutput:
+        """
+        Record feedback and memory for a parsed fix and build the output.
+
+        Args:
+            analysis: Analysis of the issue
+            original_code: Original code before the fix
+            response: Parsed fix returned by the LLM
+            used_memory: Whether memory was used for the fix
+            similar_fixes: Similar fixes from memory
+
+        Returns:
+            Fix output
+        """
+        fixed_code = response.fixed_code
+        confidence = response.confidence
+
+        # Generate automated feedback, unless the fix is empty, unchanged or too uncertain
+        if fixed_code.strip() and fixed_code.strip() != original_code.strip() and confidence >= MIN_FEEDBACK_CONFIDENCE:
+            with timed("fix.feedback"):
+                feedback = self.feedback_manager.process_automated_feedback(
+                    issue_key=analysis.issue_key,
+                    fixed_code=fixed_code,
+                    original_code=original_code
+                )
+        else:
+            feedback = FeedbackItem(
+                issue_key=analysis.issue_key,
+                feedback_text="Skipped automated feedback: no change or low confidence",
+                success=False,
+                source="automated"
+            )
+
         # Create the output
         output = CodeFixOutput(
             issue_key=analysis.issue_key,
             rule=analysis.rule,
             message=analysis.message,
             file_path=analysis.file_path,
-            fixed_code=fix_json.get("fixed_code", ""),
+            fixed_code=fixed_code,
             original_code=original_code,
-            explanation=fix_json.get("explanation", "Explanation not available"),
-            confidence=fix_json.get("confidence", 0.5),
+            explanation=response.explanation,
+            confidence=confidence,
             used_memory=used_memory,
             similar_fixes=similar_fixes,
             feedback=feedback
         )
 
-        # Save to memory
-        memory_item = FixMemory(
-            issue_key=analysis.issue_key,
-            rule=analysis.rule,
-            message=analysis.message,
-            file_path=analysis.file_path,
-            fixed_code=fix_json.get("fixed_code", ""),
-            original_code=original_code,
-            explanation=fix_json.get("explanation", "Explanation not available"),
-            success=feedback.success
-        )
-        self.memory.add_memory(memory_item)
+        # Save to memory; failed fixes are left out so they are never offered as examples
+        if feedback.success:
+            memory_item = FixMemory(
+                issue_key=analysis.issue_key,
+                rule=analysis.rule,
+                message=analysis.message,
+                file_path=analysis.file_path,
+                fixed_code=fixed_code,
+                original_code=original_code,
+                explanation=response.explanation,
+                success=feedback.success
+            )
+            with timed("fix.memory_add"):
+                self.memory.add_memory(memory_item)
 
         if used_memory:
             logger.info(f"Successfully fixed issue {analysis.issue_key} using memory")
-            if memory_usage:
-                logger.info(f"Memory usage: {memory_usage}")
+            if response.memory_usage:
+                logger.info(f"Memory usage: {response.memory_usage}")
         else:
             logger.info(f"Successfully fixed issue {analysis.issue_key}")
 
@@ -337,30 +706,40 @@ The confidence should be a number between 0 and 1 indicating how confident you a
             True if successful, False otherwise
         """
         try:
-            # Read the file
-            with open(file_path, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
+            # Stream the file and splice the fixed code over the context lines
+            replace_lines(file_path, context['start_line'], context['end_line'], fixed_code)
 
-            # Replace the context lines with the fixed code
-            start_line = context['start_line'] - 1  # Convert to 0-based indexing
-            end_line = context['end_line'] - 1      # Convert to 0-based indexing
+            logger.info(f"Successfully applied fix to {file_path}")
+            return True
 
-            # Split the fixed code into lines
-            fixed_lines = fixed_code.split('\n')
+        except Exception as e:
+            logger.error(f"Error applying fix to {file_path}: {str(e)}")
+            return False
 
-            # Add newline character to each line except the last one
-            fixed_lines = [line + '\n' for line in fixed_lines[:-1]] + [fixed_lines[-1]]
+    def apply_fixes(self, file_path: str, fixes: List[Tuple[Dict[str, Any], str]]) -> List[bool]:
+        """
+        Apply several fixes to the same file, writing it once.
 
-            # Replace the lines
-            new_lines = lines[:start_line] + fixed_lines + lines[end_line + 1:]
+        Every fix replaces the lines of the context it was made from, as they
+        were before any of the fixes, so fixes don't shift each other. A fix
+        whose context overlaps that of a fix earlier in the file is skipped.
 
-            # Write the file
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.writelines(new_lines)
+        Args:
+            file_path: Path to the file
+            fixes: (context, fixed_code) pairs
 
-            logger.info(f"Successfully applied fix to {file_path}")
-            return True
+        Returns:
+            Whether each fix was applied, in the order given
+        """
+        try:
+            applied = replace_line_ranges(file_path, [
+                (context['start_line'], context['end_line'], fixed_code)
+                for context, fixed_code in fixes
+            ])
+
+            logger.info(f"Applied {sum(applied)} of {len(fixes)} fixes to {file_path}")
+            return applied
 
         except Exception as e:
-            logger.error(f"Error applying fix to {file_path}: {str(e)}")
-            return False
+            logger.error(f"Error applying fixes to {file_path}: {str(e)}")
+            return [False] * len(fixes)
@@ -1,62 +1,22 @@
 """
 Issue Analyzer Agent for analyzing SonarQube issues.
 """
-from typing import Dict, List, Any, TypedDict, Optional
-from langchain.prompts import PromptTemplate
-from langchain.llms import GoogleGenerativeAI
-from pydantic import BaseModel, Field
+from typing import Dict, List, Any, TypedDict, Optional, Tuple
+from dataclasses import dataclass
 from config import GEMINI_API_KEY
 from src.utils.logger import setup_logger
+from src.utils.llm import get_llm
+from src.utils.prompt import CompiledPrompt
+from src.utils.llm_cache import cached_invoke, acached_invoke
+from src.utils.json_utils import extract_json
+from src.utils.metrics import timed
 from src.sonarqube.issue_fetcher import SonarQubeIssueFetcher
 from src.utils.context_extractor import extract_code_context
 
 logger = setup_logger()
 
-class IssueAnalysisInput(BaseModel):
-    """Input for the issue analyzer agent."""
-    issue: Dict[str, Any] = Field(..., description="SonarQube issue to analyze")
-    file_path: Optional[str] = Field(None, description="Path to the file containing the issue")
-    context: Optional[Dict[str, Any]] = Field(None, description="Code context if already extracted")
-
-class IssueAnalysisOutput(BaseModel):
-    """Output from the issue analyzer agent."""
-    issue_key: str = Field(..., description="SonarQube issue key")
-    rule: str = Field(..., description="SonarQube rule ID")
-    message: str = Field(..., description="Issue message")
-    file_path: str = Field(..., description="Path to the file containing the issue")
-    line_number: int = Field(..., description="Line number of the issue")
-    context: Dict[str, Any] = Field(..., description="Extracted code context")
-    analysis: str = Field(..., description="Analysis of the issue")
-    fix_strategy: str = Field(..., description="Recommended strategy to fix the issue")
-    complexity: str = Field(..., description="Estimated complexity of the fix (low, medium, high)")
-
-class IssueAnalyzerAgent:
-    """
-    Agent for analyzing SonarQube issues and extracting relevant information.
-    """
-
-    def __init__(self):
-        """Initialize the issue analyzer agent."""
-        self.api_key = GEMINI_API_KEY
-
-        # Validate configuration
-        if not self.api_key:
-            logger.error("Gemini API key not configured")
-            raise ValueError("Gemini API key not configured")
-
-        # Initialize the LLM
-        self.llm = GoogleGenerativeAI(
-            model="gemini-pro",
-            google_api_key=self.api_key,
-            temperature=0.2,
-            top_p=0.95,
-            max_output_tokens=2048
-        )
-
-        # Create the prompt template
-        self.prompt_template = PromptTemplate(
-            input_variables=["rule", "message", "file", "line", "code_context"],
-            template="""
+# Prompt for analyzing a single issue
+ANALYSIS_PROMPT = CompiledPrompt("""
 You are an expert code analyzer specializing in understanding SonarQube issues. Your task is to analyze the following issue and provide insights:
 
 1. **Issue Information**:
@@ -83,9 +43,79 @@ Return your analysis in the following JSON format:
   "complexity": "low|medium|high"
 }}
 ```
-"""
+""")
+
+@dataclass
+class IssueAnalysisInput:
+    """Input for the issue analyzer agent."""
+    issue: Dict[str, Any]  # SonarQube issue to analyze
+    file_path: Optional[str] = None  # Path to the file containing the issue
+    context: Optional[Dict[str, Any]] = None  # Code context if already extracted
+
+@dataclass
+class IssueAnalysisOutput:
+    """Output from the issue analyzer agent."""
+    issue_key: str  # SonarQube issue key
+    rule: str  # SonarQube rule ID
+    message: str  # Issue message
+    file_path: str  # Path to the file containing the issue
+    line_number: int  # Line number of the issue
+    context: Dict[str, Any]  # Extracted code context
+    analysis: str  # Analysis of the issue
+    fix_strategy: str  # Recommended strategy to fix the issue
+    complexity: str  # Estimated complexity of the fix (low, medium, high)
+
+@dataclass(frozen=True)
+class AnalysisResponse:
+    """Analysis returned by the LLM for a single issue."""
+    analysis: str = "Analysis not available"
+    fix_strategy: str = "Fix strategy not available"
+    complexity: str = "high"
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "AnalysisResponse":
+        """
+        Build an analysis response from decoded JSON.
+
+        Args:
+            data: Decoded JSON object
+
+        Returns:
+            Analysis response, with defaults for missing fields
+        """
+        return cls(
+            analysis=str(data.get("analysis", cls.analysis)),
+            fix_strategy=str(data.get("fix_strategy", cls.fix_strategy)),
+            complexity=str(data.get("complexity", cls.complexity))
         )
 
+# Used when the LLM response cannot be parsed
+ANALYSIS_PARSING_FAILED = AnalysisResponse(
+    analysis="Analysis parsing failed",
+    fix_strategy="Manual review required",
+    complexity="high"
+)
+
+class IssueAnalyzerAgent:
+    """
+    Agent for analyzing SonarQube issues and extracting relevant information.
+    """
+
+    def __init__(self):
+        """Initialize the issue analyzer agent."""
+        self.api_key = GEMINI_API_KEY
+
+        # Validate configuration
+        if not self.api_key:
+            logger.error("Gemini API key not configured")
+            raise ValueError("Gemini API key not configured")
+
+        # Use the shared LLM client; the analysis is a short JSON object, so cap the output
+        self.llm = get_llm(max_output_tokens=512)
+
+        # Prompt template is compiled once at import time
+        self.prompt_template = ANALYSIS_PROMPT
+
     def analyze_issue(self, input_data: IssueAnalysisInput) -> IssueAnalysisOutput:
         """
         Analyze a SonarQube issue.
@@ -96,6 +126,45 @@ Return your analysis in the following JSON format:
         Returns:
             Analysis output
         """
+        issue_info, prompt = self._prepare_analysis(input_data)
+
+        # Generate the analysis
+        logger.info(f"Analyzing issue {issue_info['issue_key']} using Gemini")
+        with timed("analyze.llm_invoke"):
+            analysis_text = cached_invoke(self.llm, prompt, namespace="issue_analysis_v1")
+
+        return self._parse_analysis(issue_info, analysis_text)
+
+    async def analyze_issue_async(self, input_data: IssueAnalysisInput) -> IssueAnalysisOutput:
+        """
+        Analyze a SonarQube issue without blocking the event loop on the LLM call.
+
+        Args:
+            input_data: Input data containing the issue and context
+
+        Returns:
+            Analysis output
+        """
+        issue_info, prompt = self._prepare_analysis(input_data)
+
+        # Generate the analysis
+        logger.info(f"Analyzing issue {issue_info['issue_key']} using Gemini")
+        with timed("analyze.llm_invoke"):
+            analysis_text = await acached_invoke(self.llm, prompt, namespace="issue_analysis_v1")
+
+        return self._parse_analysis(issue_info, analysis_text)
+
+    @timed("analyze.prompt_format")
+    def _prepare_analysis(self, input_data: IssueAnalysisInput) -> Tuple[Dict[str, Any], str]:
+        """
+        Extract the issue information and code context, and format the prompt.
+
+        Args:
+            input_data: Input data containing the issue and context
+
+        Returns:
+            Tuple of the extracted issue information and the formatted prompt
+        """
         issue = input_data.issue
         file_path = input_data.file_path
         context = input_data.context
@@ -128,8 +197,7 @@ Return your analysis in the following JSON format:
                     'start_line': max(1, line_number - 5),
                     'end_line': line_number + 5,
                     'context_text': f"[Could not extract code context: {str(e)}]",
-                    'all_lines': [],
-                    'context_lines': []
+                    'context_lines': ()
                 }
 
         # Format the prompt
@@ -141,51 +209,56 @@ Return your analysis in the following JSON format:
             code_context=context['context_text']
         )
 
-        # Generate the analysis
-        logger.info(f"Analyzing issue {issue_key} using Gemini")
-        analysis_text = self.llm.invoke(prompt)
+        issue_info = {
+            'issue_key': issue_key,
+            'rule': rule,
+            'message': message,
+            'file_path': file_path,
+            'line_number': line_number,
+            'context': context
+        }
+
+        return issue_info, prompt
+
+    def _parse_analysis(self, issue_info: Dict[str, Any], analysis_text: str) -> IssueAnalysisOutput:
+        """
+        Parse the LLM response into an analysis output.
+
+        Args:
+            issue_info: Issue information extracted by _prepare_analysis
+            analysis_text: Raw LLM response
+
+        Returns:
+            Analysis output
+        """
+        issue_key = issue_info['issue_key']
 
         # Parse the analysis
         try:
             # Extract JSON from the response
-            import json
-            import re
+            with timed("analyze.json_parse"):
+                analysis_json = extract_json(analysis_text)
 
-            # Find JSON in the response
-            json_match = re.search(r'```json\s*(.*?)\s*```', analysis_text, re.DOTALL)
-            if json_match:
-                analysis_json = json.loads(json_match.group(1))
+            if isinstance(analysis_json, dict):
+                response = AnalysisResponse.from_json(analysis_json)
             else:
-                # Try to find JSON without the markdown code block
-                json_match = re.search(r'({.*})', analysis_text, re.DOTALL)
-                if json_match:
-                    analysis_json = json.loads(json_match.group(1))
-                else:
-                    logger.warning(f"Could not parse JSON from analysis for issue {issue_key}")
-                    analysis_json = {
-                        "analysis": "Analysis parsing failed",
-                        "fix_strategy": "Manual review required",
-                        "complexity": "high"
-                    }
+                logger.warning(f"Could not parse JSON from analysis for issue {issue_key}")
+                response = ANALYSIS_PARSING_FAILED
         except Exception as e:
             logger.error(f"Error parsing analysis for issue {issue_key}: {str(e)}")
-            analysis_json = {
-                "analysis": "Analysis parsing failed",
-                "fix_strategy": "Manual review required",
-                "complexity": "high"
-            }
+            response = ANALYSIS_PARSING_FAILED
 
         # Create the output
         output = IssueAnalysisOutput(
             issue_key=issue_key,
-            rule=rule,
-            message=message,
-            file_path=file_path,
-            line_number=line_number,
-            context=context,
-            analysis=analysis_json.get("analysis", "Analysis not available"),
-            fix_strategy=analysis_json.get("fix_strategy", "Fix strategy not available"),
-            complexity=analysis_json.get("complexity", "high")
+            rule=issue_info['rule'],
+            message=issue_info['message'],
+            file_path=issue_info['file_path'],
+            line_number=issue_info['line_number'],
+            context=issue_info['context'],
+            analysis=response.analysis,
+            fix_strategy=response.fix_strategy,
+            complexity=response.complexity
         )
 
         logger.info(f"Successfully analyzed issue {issue_key}")
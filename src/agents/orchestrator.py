@@ -1,20 +1,47 @@
 """
 Orchestrator Agent for coordinating the AI Sonar Issue Fixer workflow.
 """
-from typing import Dict, List, Any, TypedDict, Optional
-from datetime import datetime
+from typing import Dict, List, Any, TypedDict, Iterable, Iterator, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 import os
+import time
 from pydantic import BaseModel, Field
-from config import MAX_ISSUES_PER_RUN, TEMP_DIR
+from config import MAX_ISSUES_PER_RUN, TEMP_DIR, ONE_COMMIT_PER_ISSUE
 from src.utils.logger import setup_logger
 from src.sonarqube.issue_fetcher import SonarQubeIssueFetcher
 from src.git.repo_manager import GitRepoManager
-from src.agents.issue_analyzer import IssueAnalyzerAgent, IssueAnalysisInput
+from src.agents.issue_analyzer import IssueAnalyzerAgent, IssueAnalysisInput, IssueAnalysisOutput
 from src.agents.code_fixer import CodeFixerAgent, CodeFixInput
 from src.agents.pr_creator import PRCreatorAgent, PRCreatorInput
 
 logger = setup_logger()
 
+# Create temp directory once, at import
+os.makedirs(TEMP_DIR, exist_ok=True)
+
+def _unique_issues(issues: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Skip issues identical to one already seen.
+    
+    SonarQube can report the same rule, component, line and message more than
+    once across scans; only the first such issue is kept.
+    
+    Args:
+        issues: SonarQube issues
+    
+    Yields:
+        Issues with a distinct rule, component, line and message
+    """
+    seen = set()
+    for issue in issues:
+        key = (issue.get('rule'), issue.get('component'), issue.get('line'), issue.get('message'))
+        if key in seen:
+            logger.info(f"Skipping duplicate issue: {issue.get('key')}")
+            continue
+        seen.add(key)
+        yield issue
+
 class OrchestratorInput(BaseModel):
     """Input for the orchestrator agent."""
     max_issues: int = Field(MAX_ISSUES_PER_RUN, description="Maximum number of issues to process")
@@ -51,27 +78,24 @@ class OrchestratorAgent:
         Returns:
             Workflow output
         """
-        import time
         start_time = time.time()
         
         # Generate timestamp and branch name
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(start_time))
         branch_name = f"fix/sonar-{timestamp}"
         
         logger.info(f"Starting AI Sonar Issue Fixer run at {timestamp}")
         
         try:
-            # Create temp directory if it doesn't exist
-            os.makedirs(TEMP_DIR, exist_ok=True)
-            
-            # Fetch new issues from SonarQube
+            # Stream new issues from SonarQube one page at a time
             logger.info("Fetching new issues from SonarQube...")
-            issues = self.issue_fetcher.fetch_new_issues(
+            issue_iter = self.issue_fetcher.iter_new_issues(
                 max_issues=input_data.max_issues,
                 days=input_data.days_lookback
             )
             
-            if not issues:
+            first_issue = next(issue_iter, None)
+            if first_issue is None:
                 logger.info("No new issues found. Exiting.")
                 return OrchestratorOutput(
                     num_issues_found=0,
@@ -79,62 +103,95 @@ class OrchestratorAgent:
                     duration_seconds=time.time() - start_time
                 )
             
-            logger.info(f"Found {len(issues)} new issues to fix")
-            
             # Clone repository and create a new branch
             logger.info(f"Cloning repository and creating branch: {branch_name}")
             self.git_manager = GitRepoManager()
             repo_path = self.git_manager.clone_repo()
             self.git_manager.create_branch(branch_name)
             
-            # Process each issue
+            # Analyze the issues concurrently; the LLM round-trips dominate
+            # wall time and are independent across issues
             fixed_issues = []
+            max_workers = min(10, input_data.max_issues)
+            logger.info(f"Analyzing issues with {max_workers} workers")
             
-            for i, issue in enumerate(issues):
-                logger.info(f"Processing issue {i+1}/{len(issues)}: {issue['key']}")
+            # List the repository once instead of a stat() per issue
+            existing_files = self._list_repo_files(repo_path)
+            
+            # Issues are submitted as their page arrives, so analysis of the
+            # first page overlaps with fetching the next ones
+            issues = []
+            futures = []
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for issue in _unique_issues(chain([first_issue], issue_iter)):
+                    issues.append(issue)
+                    futures.append(executor.submit(self._analyze_issue, issue, repo_path, existing_files))
                 
+                logger.info(f"Found {len(issues)} new issues to fix")
+                results = [future.result() for future in futures]
+            
+            analyzed = [(issue,) + result for issue, result in zip(issues, results) if result is not None]
+            
+            # Fix the analyzed issues, batching issues in the same file into one
+            # prompt; issues whose fix failed come back as None and are skipped
+            fixes = self.code_fixer.fix_issues_batch(
+                [CodeFixInput(analysis=analysis) for _, _, analysis in analyzed],
+                group_by="file_path",
+                max_workers=max_workers
+            )
+            
+            # Apply serially; the git index isn't thread-safe. Every fix was made
+            # from the file as it was before any of them, so the fixes to a file
+            # are applied together, each over its own original lines; applying
+            # them one by one would shift the lines of the later ones. The fixes
+            # are committed together after the loop unless ONE_COMMIT_PER_ISSUE
+            # is set
+            by_file = {}
+            for (issue, file_path, analysis), fix in zip(analyzed, fixes):
+                if fix is None:
+                    logger.warning(f"Could not fix issue {issue['key']}. Skipping.")
+                    continue
+                by_file.setdefault(file_path, []).append((issue, analysis, fix))
+            
+            pending_commits = []
+            for file_path, file_fixes in by_file.items():
                 try:
-                    # Extract file path
-                    file_path = issue['component'].split(':')[-1]
-                    full_file_path = os.path.join(repo_path, file_path)
-                    
-                    # Skip if file doesn't exist
-                    if not os.path.exists(full_file_path):
-                        logger.warning(f"File not found: {file_path}. Skipping issue.")
-                        continue
-                    
-                    # Step 1: Analyze the issue
-                    analysis_input = IssueAnalysisInput(
-                        issue=issue,
-                        file_path=full_file_path
+                    # Apply the fixes
+                    applied = self.code_fixer.apply_fixes(
+                        os.path.join(repo_path, file_path),
+                        [(analysis.context, fix.fixed_code) for _, analysis, fix in file_fixes]
                     )
                     
-                    analysis = self.issue_analyzer.analyze_issue(analysis_input)
+                    file_commits = []
+                    file_fixed = []
+                    for (issue, _, fix), success in zip(file_fixes, applied):
+                        if not success:
+                            logger.warning(f"Could not apply fix for issue {issue['key']}. Skipping.")
+                            continue
+                        
+                        file_commits.append((file_path, issue['key'], issue['message']))
+                        file_fixed.append(fix)
                     
-                    # Step 2: Fix the issue
-                    fix_input = CodeFixInput(analysis=analysis)
-                    fix = self.code_fixer.fix_issue(fix_input)
-                    
-                    # Step 3: Apply the fix
-                    success = self.code_fixer.apply_fix(
-                        file_path=full_file_path,
-                        context=analysis.context,
-                        fixed_code=fix.fixed_code
-                    )
-                    
-                    if not success:
-                        logger.warning(f"Could not apply fix for issue {issue['key']}. Skipping.")
-                        continue
-                    
-                    # Step 4: Commit the change
-                    commit_message = f"Fix SonarQube issue: {issue['key']}\n\n{issue['message']}"
-                    self.git_manager.commit_changes(file_path, commit_message)
-                    
-                    fixed_issues.append(fix)
-                    logger.info(f"Successfully fixed issue: {issue['key']}")
+                    if not ONE_COMMIT_PER_ISSUE:
+                        pending_commits.extend(file_commits)
+                    elif len(file_commits) == 1:
+                        _, issue_key, message = file_commits[0]
+                        commit_message = f"Fix SonarQube issue: {issue_key}\n\n{message}"
+                        self.git_manager.commit_changes(file_path, commit_message)
+                    elif file_commits:
+                        # The file was written once with all of its fixes
+                        self.git_manager.commit_all(file_commits, summary=f"Fix SonarQube issues in {file_path}")
                     
+                    for fix in file_fixed:
+                        logger.info(f"Successfully fixed issue: {fix.issue_key}")
+                    fixed_issues.extend(file_fixed)
+                
                 except Exception as e:
-                    logger.error(f"Error processing issue {issue['key']}: {str(e)}")
+                    logger.error(f"Error processing issues in {file_path}: {str(e)}")
+            
+            # Commit every applied fix at once
+            if pending_commits:
+                self.git_manager.commit_all(pending_commits)
             
             # If no issues were fixed, exit
             if not fixed_issues:
@@ -182,3 +239,66 @@ class OrchestratorAgent:
             # Clean up
             if self.git_manager:
                 self.git_manager.cleanup()
+    
+    def _list_repo_files(self, repo_path: str) -> Set[str]:
+        """
+        List the files in the cloned repository.
+        
+        Args:
+            repo_path: Path to the cloned repository
+        
+        Returns:
+            Set of file paths relative to the repository, using forward slashes
+            like SonarQube component keys
+        """
+        existing_files = set()
+        for root, dirs, files in os.walk(repo_path):
+            # Skip git metadata
+            if '.git' in dirs:
+                dirs.remove('.git')
+            relative_root = os.path.relpath(root, repo_path)
+            for name in files:
+                relative_path = name if relative_root == os.curdir else os.path.join(relative_root, name)
+                existing_files.add(relative_path.replace(os.sep, '/'))
+        return existing_files
+    
+    def _analyze_issue(
+        self,
+        issue: Dict[str, Any],
+        repo_path: str,
+        existing_files: Set[str]
+    ) -> Optional[Tuple[str, IssueAnalysisOutput]]:
+        """
+        Analyze a single issue without touching the working tree.
+        
+        Args:
+            issue: SonarQube issue
+            repo_path: Path to the cloned repository
+            existing_files: Files in the repository, from _list_repo_files
+        
+        Returns:
+            Tuple of the file path relative to the repository and the analysis,
+            or None if the file doesn't exist or the analysis failed
+        """
+        logger.info(f"Analyzing issue: {issue['key']}")
+        
+        try:
+            # Extract file path
+            file_path = issue['component'].split(':')[-1]
+            full_file_path = os.path.join(repo_path, file_path)
+            
+            # Skip if file doesn't exist
+            if file_path not in existing_files:
+                logger.warning(f"File not found: {file_path}. Skipping issue.")
+                return None
+            
+            analysis_input = IssueAnalysisInput(
+                issue=issue,
+                file_path=full_file_path
+            )
+            
+            return file_path, self.issue_analyzer.analyze_issue(analysis_input)
+        
+        except Exception as e:
+            logger.error(f"Error analyzing issue {issue['key']}: {str(e)}")
+            return None
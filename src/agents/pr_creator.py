@@ -1,17 +1,42 @@
 """
 PR Creator Agent for creating pull requests with fixed code.
 """
-from typing import Dict, List, Any, TypedDict, Optional
-from langchain.prompts import PromptTemplate
-from langchain.llms import GoogleGenerativeAI
+from typing import Dict, List, Any, TypedDict, Optional, Tuple
 from pydantic import BaseModel, Field
 from config import GEMINI_API_KEY, GIT_MASTER_BRANCH
 from src.utils.logger import setup_logger
+from src.utils.llm import get_llm
+from src.utils.prompt import CompiledPrompt
+from src.utils.llm_cache import cached_invoke
+from src.utils.json_utils import dumps, extract_json
 from src.azure.devops_client import AzureDevOpsClient
 from src.agents.code_fixer import CodeFixOutput
 
 logger = setup_logger()
 
+# Prompt for writing the PR title and description from the fixed issues
+PR_PROMPT = CompiledPrompt("""
+You are an expert at creating clear and informative pull request descriptions. Your task is to create a PR description for the following fixed SonarQube issues:
+
+1. **Fixed Issues**:
+{fixed_issues_json}
+
+2. **PR Description Task**:
+   - Create a clear and concise PR title
+   - Create a detailed PR description that explains the fixes
+   - Group similar issues together
+   - Highlight any important changes
+
+3. **Return Format**:
+Return your PR description in the following JSON format:
+```json
+{{
+  "pr_title": "Fix SonarQube issues: [brief summary]",
+  "pr_description": "# Fixed SonarQube Issues\\n\\n[detailed description with markdown formatting]"
+}}
+```
+""")
+
 class PRCreatorInput(BaseModel):
     """Input for the PR creator agent."""
     fixed_issues: List[CodeFixOutput] = Field(..., description="List of fixed issues")
@@ -40,40 +65,11 @@ class PRCreatorAgent:
             logger.error("Gemini API key not configured")
             raise ValueError("Gemini API key not configured")
         
-        # Initialize the LLM
-        self.llm = GoogleGenerativeAI(
-            model="gemini-pro",
-            google_api_key=self.api_key,
-            temperature=0.2,
-            top_p=0.95,
-            max_output_tokens=2048
-        )
+        # Use the shared LLM client
+        self.llm = get_llm()
         
-        # Create the prompt template
-        self.prompt_template = PromptTemplate(
-            input_variables=["fixed_issues_json"],
-            template="""
-You are an expert at creating clear and informative pull request descriptions. Your task is to create a PR description for the following fixed SonarQube issues:
-
-1. **Fixed Issues**:
-{fixed_issues_json}
-
-2. **PR Description Task**:
-   - Create a clear and concise PR title
-   - Create a detailed PR description that explains the fixes
-   - Group similar issues together
-   - Highlight any important changes
-
-3. **Return Format**:
-Return your PR description in the following JSON format:
-```json
-{{
-  "pr_title": "Fix SonarQube issues: [brief summary]",
-  "pr_description": "# Fixed SonarQube Issues\\n\\n[detailed description with markdown formatting]"
-}}
-```
-"""
-        )
+        # Prompt template is compiled once at import time
+        self.prompt_template = PR_PROMPT
     
     def create_pull_request(self, input_data: PRCreatorInput) -> PRCreatorOutput:
         """
@@ -85,18 +81,28 @@ Return your PR description in the following JSON format:
         Returns:
             PR creation output
         """
-        fixed_issues = input_data.fixed_issues
-        branch_name = input_data.branch_name
-        target_branch = input_data.target_branch
+        pr_title, pr_description = self.compose_description(input_data.fixed_issues)
+        return self.submit(input_data, pr_title, pr_description)
+    
+    def compose_description(self, fixed_issues: List[CodeFixOutput]) -> Tuple[str, str]:
+        """
+        Write the title and description of a pull request for fixed issues.
         
+        Doesn't need the branch, so it can run while the branch is pushed.
+        
+        Args:
+            fixed_issues: List of fixed issues
+            
+        Returns:
+            PR title and description
+        """
         # Convert fixed issues to JSON for the prompt
-        import json
-        fixed_issues_json = json.dumps([{
+        fixed_issues_json = dumps([{
             "issue_key": issue.issue_key,
             "file_path": issue.file_path,
             "explanation": issue.explanation,
             "confidence": issue.confidence
-        } for issue in fixed_issues], indent=2)
+        } for issue in fixed_issues], indent=True)
         
         # Format the prompt
         prompt = self.prompt_template.format(
@@ -105,29 +111,18 @@ Return your PR description in the following JSON format:
         
         # Generate the PR description
         logger.info(f"Generating PR description for {len(fixed_issues)} fixed issues")
-        pr_text = self.llm.invoke(prompt)
+        pr_text = cached_invoke(self.llm, prompt, namespace="pr_desc_v1")
         
         # Parse the PR description
         try:
-            # Extract JSON from the response
-            import json
-            import re
-            
-            # Find JSON in the response
-            json_match = re.search(r'```json\s*(.*?)\s*```', pr_text, re.DOTALL)
-            if json_match:
-                pr_json = json.loads(json_match.group(1))
-            else:
-                # Try to find JSON without the markdown code block
-                json_match = re.search(r'({.*})', pr_text, re.DOTALL)
-                if json_match:
-                    pr_json = json.loads(json_match.group(1))
-                else:
-                    logger.warning("Could not parse JSON from PR description")
-                    pr_json = {
-                        "pr_title": f"Fix {len(fixed_issues)} SonarQube issues",
-                        "pr_description": self._generate_fallback_description(fixed_issues)
-                    }
+            # Extract JSON from the response in a single forward scan
+            pr_json = extract_json(pr_text)
+            if not isinstance(pr_json, dict):
+                logger.warning("Could not parse JSON from PR description")
+                pr_json = {
+                    "pr_title": f"Fix {len(fixed_issues)} SonarQube issues",
+                    "pr_description": self._generate_fallback_description(fixed_issues)
+                }
         except Exception as e:
             logger.error(f"Error parsing PR description: {str(e)}")
             pr_json = {
@@ -135,10 +130,27 @@ Return your PR description in the following JSON format:
                 "pr_description": self._generate_fallback_description(fixed_issues)
             }
         
-        # Create the PR
         pr_title = pr_json.get("pr_title", f"Fix {len(fixed_issues)} SonarQube issues")
         pr_description = pr_json.get("pr_description", self._generate_fallback_description(fixed_issues))
+        return pr_title, pr_description
+    
+    def submit(self, input_data: PRCreatorInput, pr_title: str, pr_description: str) -> PRCreatorOutput:
+        """
+        Create the pull request in Azure DevOps; the branch must already be pushed.
         
+        Args:
+            input_data: Input data containing the fixed issues and branch information
+            pr_title: Title of the PR
+            pr_description: Description of the PR
+            
+        Returns:
+            PR creation output
+        """
+        fixed_issues = input_data.fixed_issues
+        branch_name = input_data.branch_name
+        target_branch = input_data.target_branch
+        
+        # Create the PR
         logger.info(f"Creating PR from {branch_name} to {target_branch}")
         pr_url = self.azure_client.create_pull_request(
             source_branch=branch_name,
@@ -2,41 +2,45 @@
 AI-powered code fixer using Gemini 2.0 via LangChain.
 """
 import os
-from langchain.llms import GoogleGenerativeAI
-from langchain.prompts import PromptTemplate
+import re
+import hashlib
+import threading
+from collections import OrderedDict
 from config import GEMINI_API_KEY, CONTEXT_LINES_BEFORE, CONTEXT_LINES_AFTER
 from src.utils.context_extractor import extract_code_context
 from src.utils.logger import setup_logger
+from src.utils.llm import get_llm
+from src.utils.prompt import CompiledPrompt
+from src.utils.llm_cache import cached_invoke
+from src.utils.file_patch import replace_lines
 
 logger = setup_logger()
 
-class CodeFixer:
-    """
-    AI-powered code fixer using Gemini 2.0.
+# Number of fixes memoized per process
+FIX_CACHE_SIZE = 512
+
+# Approximate token budget for a prompt, estimated at 4 characters per token;
+# larger prompts are rejected by Gemini after a full round trip
+MAX_PROMPT_TOKENS = 6000
+CHARS_PER_TOKEN = 4
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def _context_fingerprint(context_text):
     """
+    Fingerprint code context, ignoring whitespace-only differences.
     
-    def __init__(self):
-        """Initialize the code fixer."""
-        self.api_key = GEMINI_API_KEY
-        
-        # Validate configuration
-        if not self.api_key:
-            logger.error("Gemini API key not configured")
-            raise ValueError("Gemini API key not configured")
+    Args:
+        context_text (str): Code context
         
-        # Initialize the LLM
-        self.llm = GoogleGenerativeAI(
-            model="gemini-pro",
-            google_api_key=self.api_key,
-            temperature=0.2,
-            top_p=0.95,
-            max_output_tokens=2048
-        )
-        
-        # Create the prompt template
-        self.prompt_template = PromptTemplate(
-            input_variables=["rule", "message", "file", "line", "code_context"],
-            template="""
+    Returns:
+        str: Hex digest of the normalized context
+    """
+    normalized = _WHITESPACE_PATTERN.sub(' ', context_text).strip()
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+# Prompt for fixing a single issue from its code context
+FIX_PROMPT = CompiledPrompt("""
 You are an AI assistant designed to help improve code by fixing issues identified by SonarQube. The following is the context and task you need to handle:
 
 1. **Issue Information**: 
@@ -58,8 +62,63 @@ You are an AI assistant designed to help improve code by fixing issues identifie
 
 4. **Return Format**:
 Return ONLY the fixed code snippet, nothing else. The fixed code should be a direct replacement for the provided code context.
-"""
-        )
+""")
+
+def _narrow_context(context, max_chars):
+    """
+    Drop the outermost context lines until the context text fits in max_chars.
+    
+    Lines are dropped from both ends alternately, keeping the target line.
+    The context is updated in place so that apply_fix replaces the same lines
+    that were sent to the LLM.
+    
+    Args:
+        context (dict): Code context
+        max_chars (int): Maximum length of the context text
+    """
+    lines = context['context_lines']
+    start_line = context['start_line']
+    target_index = context['target_line'] - start_line
+    first, last = 0, len(lines) - 1
+    size = len(context['context_text'])
+    
+    while size > max_chars and first < last:
+        # Drop from the side farther from the target line
+        if target_index - first >= last - target_index:
+            size -= len(lines[first])
+            first += 1
+        else:
+            size -= len(lines[last])
+            last -= 1
+    
+    context['context_lines'] = lines[first:last + 1]
+    context['context_text'] = ''.join(context['context_lines'])
+    context['start_line'] = start_line + first
+    context['end_line'] = start_line + last
+
+class CodeFixer:
+    """
+    AI-powered code fixer using Gemini 2.0.
+    """
+    
+    def __init__(self):
+        """Initialize the code fixer."""
+        self.api_key = GEMINI_API_KEY
+        
+        # Validate configuration
+        if not self.api_key:
+            logger.error("Gemini API key not configured")
+            raise ValueError("Gemini API key not configured")
+        
+        # Use the shared LLM client
+        self.llm = get_llm()
+        
+        # Fixes already generated in this process, keyed by (rule, message, context fingerprint)
+        self._fix_cache = OrderedDict()
+        self._fix_cache_lock = threading.Lock()
+        
+        # Prompt template is compiled once at import time
+        self.prompt_template = FIX_PROMPT
     
     def extract_context(self, file_path, issue):
         """
@@ -91,7 +150,7 @@ Return ONLY the fixed code snippet, nothing else. The fixed code should be a dir
         
         Args:
             issue (dict): SonarQube issue
-            context (dict): Code context
+            context (dict): Code context, narrowed in place if the prompt is too long
             
         Returns:
             str: Fixed code
@@ -116,13 +175,41 @@ Return ONLY the fixed code snippet, nothing else. The fixed code should be a dir
                 code_context=context['context_text']
             )
             
+            # Narrow oversized contexts locally instead of waiting for Gemini to reject them
+            max_chars = MAX_PROMPT_TOKENS * CHARS_PER_TOKEN
+            if len(prompt) > max_chars:
+                logger.warning(f"Prompt for issue {issue.get('key')} is too long, narrowing the code context")
+                _narrow_context(context, len(context['context_text']) - (len(prompt) - max_chars))
+                prompt = self.prompt_template.format(
+                    rule=rule,
+                    message=message,
+                    file=file,
+                    line=line,
+                    code_context=context['context_text']
+                )
+            
+            # Reuse the fix for an identical rule, message and context seen earlier
+            # in this run; the key is taken after narrowing, so a reused fix
+            # replaces the same lines it was generated for
+            cache_key = (rule, message, _context_fingerprint(context['context_text']))
+            with self._fix_cache_lock:
+                if cache_key in self._fix_cache:
+                    self._fix_cache.move_to_end(cache_key)
+                    logger.info(f"Reusing fix for issue {issue.get('key')} from an identical issue")
+                    return self._fix_cache[cache_key]
+            
             # Generate the fixed code
             logger.info(f"Generating fix for issue {issue.get('key')} using Gemini")
-            fixed_code = self.llm.invoke(prompt)
+            fixed_code = cached_invoke(self.llm, prompt, namespace="code_fixer_v1")
             
             # Clean up the response
             fixed_code = fixed_code.strip()
             
+            with self._fix_cache_lock:
+                self._fix_cache[cache_key] = fixed_code
+                if len(self._fix_cache) > FIX_CACHE_SIZE:
+                    self._fix_cache.popitem(last=False)
+            
             # Log success
             logger.info(f"Successfully generated fix for issue {issue.get('key')}")
             return fixed_code
@@ -144,26 +231,8 @@ Return ONLY the fixed code snippet, nothing else. The fixed code should be a dir
             bool: True if successful, False otherwise
         """
         try:
-            # Read the file
-            with open(file_path, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-            
-            # Replace the context lines with the fixed code
-            start_line = context['start_line'] - 1  # Convert to 0-based indexing
-            end_line = context['end_line'] - 1      # Convert to 0-based indexing
-            
-            # Split the fixed code into lines
-            fixed_lines = fixed_code.split('\n')
-            
-            # Add newline character to each line except the last one
-            fixed_lines = [line + '\n' for line in fixed_lines[:-1]] + [fixed_lines[-1]]
-            
-            # Replace the lines
-            new_lines = lines[:start_line] + fixed_lines + lines[end_line + 1:]
-            
-            # Write the file
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.writelines(new_lines)
+            # Stream the file and splice the fixed code over the context lines
+            replace_lines(file_path, context['start_line'], context['end_line'], fixed_code)
             
             logger.info(f"Successfully applied fix to {file_path}")
             return True
@@ -1,6 +1,7 @@
 """
 Azure DevOps client for creating and managing pull requests.
 """
+import importlib
 from azure.devops.connection import Connection
 from msrest.authentication import BasicAuthentication
 from retry import retry
@@ -14,6 +15,18 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
+def _ref(branch_name):
+    """
+    Get the full Git ref name of a branch.
+    
+    Args:
+        branch_name (str): Branch name
+        
+    Returns:
+        str: Ref name, e.g. refs/heads/main
+    """
+    return "refs/heads/" + branch_name
+
 class AzureDevOpsClient:
     """
     Client for interacting with Azure DevOps API.
@@ -37,6 +50,16 @@ class AzureDevOpsClient:
         
         # Get clients
         self.git_client = self.connection.clients.get_git_client()
+        
+        # Use the models of the API version the client speaks, which depends
+        # on the installed azure-devops release; the client's package
+        # re-exports them
+        self.git_models = importlib.import_module(type(self.git_client).__module__.rsplit('.', 1)[0])
+        
+        # Keep the HTTP session open between requests so the PR and reviewer
+        # calls (and their retries) reuse one TLS connection; msrest closes
+        # it after every request by default
+        self.git_client.config.keep_alive = True
     
     @retry(tries=3, delay=2, backoff=2, logger=logger)
     def create_pull_request(self, source_branch, target_branch, title, description):
@@ -52,15 +75,13 @@ class AzureDevOpsClient:
         Returns:
             str: URL of the created pull request
         """
-        from azure.devops.v6_0.git.models import GitPullRequest
-        
         logger.info(f"Creating pull request from {source_branch} to {target_branch}")
         
         try:
             # Create pull request
-            pr = GitPullRequest(
-                source_ref_name=f"refs/heads/{source_branch}",
-                target_ref_name=f"refs/heads/{target_branch}",
+            pr = self.git_models.GitPullRequest(
+                source_ref_name=_ref(source_branch),
+                target_ref_name=_ref(target_branch),
                 title=title,
                 description=description
             )
@@ -86,21 +107,18 @@ class AzureDevOpsClient:
             pull_request_id (int): Pull request ID
             reviewer_ids (list): List of reviewer IDs
         """
-        from azure.devops.v6_0.git.models import IdentityRefWithVote
-        
         logger.info(f"Adding reviewers to pull request {pull_request_id}")
         
         try:
-            reviewers = [IdentityRefWithVote(id=reviewer_id) for reviewer_id in reviewer_ids]
+            reviewers = [self.git_models.IdentityRefWithVote(id=reviewer_id) for reviewer_id in reviewer_ids]
             
-            for reviewer in reviewers:
-                self.git_client.create_pull_request_reviewer(
-                    reviewer,
-                    self.repo_id,
-                    pull_request_id,
-                    reviewer.id,
-                    self.project
-                )
+            # Add all reviewers in a single request
+            self.git_client.create_pull_request_reviewers(
+                reviewers,
+                self.repo_id,
+                pull_request_id,
+                self.project
+            )
             
             logger.info(f"Added {len(reviewers)} reviewers to pull request {pull_request_id}")
         
@@ -4,11 +4,10 @@ Dashboard application for visualizing the AI Sonar Issue Fixer.
 import os
 import json
 import time
+import heapq
 from datetime import datetime
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from src.utils.memory import AgentMemory
 from src.utils.feedback import FeedbackManager
 
@@ -20,43 +19,154 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Columns of the memories DataFrame
+MEMORY_COLUMNS = [
+    "issue_key", "rule", "success", "timestamp", "used_memory", "file_path",
+    "message", "original_code", "fixed_code", "explanation"
+]
+
+def _file_mtime(path):
+    """Get the modification time of a file, or 0 if it doesn't exist."""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+# Memory and feedback are loaded once per server process and shared by every
+# session; they are reloaded only when their files change
+@st.cache_resource
+def _get_memory():
+    """Create the shared agent memory."""
+    return AgentMemory()
+
+@st.cache_resource
+def _get_feedback_manager(_memory):
+    """Create the shared feedback manager."""
+    return FeedbackManager(memory=_memory)
+
+@st.cache_resource
+def _loaded_mtimes():
+    """Modification times of the data files when they were last loaded, by path."""
+    return {}
+
+def _reload_if_changed(path, load):
+    """Reload a shared manager if its file changed since it was last loaded."""
+    mtime = _file_mtime(path)
+    loaded_mtimes = _loaded_mtimes()
+    if loaded_mtimes.setdefault(path, mtime) != mtime:
+        loaded_mtimes[path] = mtime
+        load()
+
+# Fragment reruns skip the top level of the script, so every page that reads
+# the managers calls this itself before looking up the cached aggregates
+def _reload_managers(memory, feedback_manager):
+    """Reload memory and feedback if their files changed since they were last loaded."""
+    _reload_if_changed(memory.memory_file, memory.load_memories)
+    _reload_if_changed(feedback_manager.feedback_file, feedback_manager.load_feedback)
+
 # Initialize memory and feedback with error handling
 try:
-    memory = AgentMemory()
-    feedback_manager = FeedbackManager(memory=memory)
+    memory = _get_memory()
+    feedback_manager = _get_feedback_manager(memory)
 except Exception as e:
     st.error(f"Error initializing memory or feedback: {str(e)}")
     # Create empty instances as fallback
-    memory = AgentMemory(memory_file="empty_memory.json")
-    feedback_manager = FeedbackManager(feedback_file="empty_feedback.json", memory=memory)
+    memory = AgentMemory(memory_file="empty_memory.jsonl")
+    feedback_manager = FeedbackManager(feedback_file="empty_feedback.jsonl", memory=memory)
+
+_reload_managers(memory, feedback_manager)
+
+# Aggregations are cached by data file and modification time, so reruns reuse
+# them until the file changes; the leading underscore keeps Streamlit from
+# hashing the manager objects
+@st.cache_data(ttl=30)
+def _cached_memories_df(_memory, memory_file, mtime):
+    """
+    Get the memories as a DataFrame for a version of the memory file.
+
+    Every page derives its memory aggregates from this one frame, built in a
+    single pass over the memories.
+    """
+    return pd.DataFrame.from_records(
+        (
+            (
+                m.issue_key,
+                m.rule,
+                m.success,
+                m.timestamp,
+                getattr(m, "used_memory", False),
+                m.file_path,
+                m.message,
+                m.original_code,
+                m.fixed_code,
+                m.explanation
+            )
+            for m in _memory.memories
+        ),
+        columns=MEMORY_COLUMNS
+    )
+
+@st.cache_data(ttl=60)
+def _cached_feedback_stats(_feedback_manager, feedback_file, mtime):
+    """Get feedback statistics for a version of the feedback file."""
+    return _feedback_manager.get_feedback_stats()
+
+@st.cache_data(ttl=30)
+def _cached_feedback_index(_feedback_manager, feedback_file, mtime):
+    """Group feedback by issue key for a version of the feedback file."""
+    feedback_index = {}
+    for feedback in _feedback_manager.feedback_items:
+        feedback_index.setdefault(feedback.issue_key, []).append(feedback)
+    return feedback_index
+
+def _rule_counts(memories_df):
+    """Count total and successful fixes per rule."""
+    counts = memories_df.groupby("rule")["success"].agg(["count", "sum"])
+    return pd.DataFrame({
+        "Rule": counts.index,
+        "Total": counts["count"].to_numpy(),
+        "Successful": counts["sum"].to_numpy()
+    })
+
+def _format_local_times(timestamps, time_format):
+    """Format Unix timestamps in the local timezone, as datetime.fromtimestamp would."""
+    local_timezone = datetime.now().astimezone().tzinfo
+    return (
+        pd.to_datetime(timestamps, unit="s", utc=True)
+        .dt.tz_convert(local_timezone)
+        .dt.strftime(time_format)
+    )
 
 # Title
 st.title("🔍 AI Sonar Issue Fixer Dashboard")
 st.markdown("Monitor and analyze the performance of the AI Sonar Issue Fixer")
 
-# Sidebar
-st.sidebar.header("Navigation")
-page = st.sidebar.radio("Go to", ["Overview", "Memory Analysis", "Feedback Analysis", "Agent Interactions"])
-
 # Overview page
-if page == "Overview":
+@st.fragment
+def overview_page(memory, feedback_manager):
+    """Render the Overview page."""
+    import plotly.express as px
+    _reload_managers(memory, feedback_manager)
+    memories_df = _cached_memories_df(memory, memory.memory_file, _file_mtime(memory.memory_file))
+
     st.header("System Overview")
 
     # Get statistics
-    memory_stats = memory.get_memory_stats()
-    feedback_stats = feedback_manager.get_feedback_stats()
+    total_memories = len(memories_df)
+    successful_fixes = int(memories_df["success"].sum())
+    feedback_stats = _cached_feedback_stats(feedback_manager, feedback_manager.feedback_file, _file_mtime(feedback_manager.feedback_file))
 
     # Create columns for metrics
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("Total Fixes", memory_stats.get("total_memories", 0))
+        st.metric("Total Fixes", total_memories)
 
     with col2:
-        st.metric("Successful Fixes", memory_stats.get("successful_fixes", 0))
+        st.metric("Successful Fixes", successful_fixes)
 
     with col3:
-        success_rate = memory_stats.get("success_rate", 0) * 100
+        success_rate = successful_fixes / total_memories * 100 if total_memories > 0 else 0
         st.metric("Success Rate", f"{success_rate:.1f}%")
 
     with col4:
@@ -65,18 +175,9 @@ if page == "Overview":
     # Create a chart for rule distribution
     st.subheader("Rule Distribution")
 
-    rules = memory_stats.get("rules", {})
-    if rules:
-        rule_data = []
-        for rule, stats in rules.items():
-            rule_data.append({
-                "Rule": rule,
-                "Total": stats["total"],
-                "Successful": stats["successful"],
-                "Failed": stats["total"] - stats["successful"]
-            })
-
-        rule_df = pd.DataFrame(rule_data)
+    rule_df = _rule_counts(memories_df)
+    if not rule_df.empty:
+        rule_df["Failed"] = rule_df["Total"] - rule_df["Successful"]
 
         # Create a stacked bar chart
         fig = px.bar(
@@ -96,71 +197,82 @@ if page == "Overview":
     st.subheader("Recent Activity")
 
     # Get recent memories
-    recent_memories = sorted(memory.memories, key=lambda m: m.timestamp, reverse=True)[:10]
-
-    if recent_memories:
-        for memory_item in recent_memories:
-            with st.expander(f"{memory_item.issue_key} - {memory_item.rule}"):
-                st.markdown(f"**Message:** {memory_item.message}")
-                st.markdown(f"**File:** {memory_item.file_path}")
-                st.markdown(f"**Status:** {'✅ Success' if memory_item.success else '❌ Failed'}")
-                st.markdown(f"**Time:** {datetime.fromtimestamp(memory_item.timestamp).strftime('%Y-%m-%d %H:%M:%S')}")
-
-                # Show code diff
-                if memory_item.original_code and memory_item.fixed_code:
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.markdown("**Original Code:**")
-                        st.code(memory_item.original_code)
-
-                    with col2:
-                        st.markdown("**Fixed Code:**")
-                        st.code(memory_item.fixed_code)
-
-                st.markdown(f"**Explanation:** {memory_item.explanation}")
-
-                # Show feedback if available
-                feedback_items = feedback_manager.get_feedback_for_issue(memory_item.issue_key)
-                if feedback_items:
-                    st.markdown("**Feedback:**")
-                    for feedback in feedback_items:
-                        st.markdown(f"- {feedback.feedback_text} ({'✅' if feedback.success else '❌'}) - {feedback.source}")
+    recent_memories = memories_df.nlargest(10, "timestamp")
+
+    if not recent_memories.empty:
+        # One grid for the list; details are only rendered for the selected row
+        recent_df = pd.DataFrame({
+            "Issue": recent_memories["issue_key"].to_numpy(),
+            "Rule": recent_memories["rule"].to_numpy(),
+            "Status": recent_memories["success"].map({True: "✅ Success", False: "❌ Failed"}).to_numpy(),
+            "Time": _format_local_times(recent_memories["timestamp"], "%Y-%m-%d %H:%M:%S").to_numpy(),
+            "File": recent_memories["file_path"].to_numpy()
+        })
+
+        event = st.dataframe(
+            recent_df,
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="single-row"
+        )
+
+        selected_rows = event.selection.rows
+        if selected_rows:
+            memory_item = next(recent_memories.iloc[selected_rows[:1]].itertuples(index=False))
+
+            st.markdown(f"**Message:** {memory_item.message}")
+
+            # Show code diff
+            if memory_item.original_code and memory_item.fixed_code:
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.markdown("**Original Code:**")
+                    st.code(memory_item.original_code)
+
+                with col2:
+                    st.markdown("**Fixed Code:**")
+                    st.code(memory_item.fixed_code)
+
+            st.markdown(f"**Explanation:** {memory_item.explanation}")
+
+            # Show feedback if available
+            feedback_index = _cached_feedback_index(feedback_manager, feedback_manager.feedback_file, _file_mtime(feedback_manager.feedback_file))
+            feedback_items = feedback_index.get(memory_item.issue_key, ())
+            if feedback_items:
+                st.markdown("**Feedback:**")
+                for feedback in feedback_items:
+                    st.markdown(f"- {feedback.feedback_text} ({'✅' if feedback.success else '❌'}) - {feedback.source}")
+        else:
+            st.caption("Select a row to see the fix details.")
     else:
         st.info("No recent activity available yet.")
 
 # Memory Analysis page
-elif page == "Memory Analysis":
-    st.header("Memory Analysis")
+@st.fragment
+def memory_page(memory, feedback_manager):
+    """Render the Memory Analysis page."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+    _reload_managers(memory, feedback_manager)
+    memories_df = _cached_memories_df(memory, memory.memory_file, _file_mtime(memory.memory_file))
 
-    # Get memory statistics
-    memory_stats = memory.get_memory_stats()
+    st.header("Memory Analysis")
 
     # Success rate over time
     st.subheader("Success Rate Over Time")
 
-    # Group memories by day
-    memories_by_day = {}
-    for memory_item in memory.memories:
-        day = datetime.fromtimestamp(memory_item.timestamp).strftime("%Y-%m-%d")
-        if day not in memories_by_day:
-            memories_by_day[day] = {"total": 0, "successful": 0}
-
-        memories_by_day[day]["total"] += 1
-        if memory_item.success:
-            memories_by_day[day]["successful"] += 1
-
-    if memories_by_day:
-        day_data = []
-        for day, stats in memories_by_day.items():
-            success_rate = stats["successful"] / stats["total"] if stats["total"] > 0 else 0
-            day_data.append({
-                "Day": day,
-                "Success Rate": success_rate * 100,
-                "Total": stats["total"]
-            })
-
-        day_df = pd.DataFrame(day_data)
-        day_df = day_df.sort_values("Day")
+    # Group memories by (local) day in one vectorized pass
+    if not memories_df.empty:
+        days = _format_local_times(memories_df["timestamp"], "%Y-%m-%d").rename("Day")
+
+        day_df = (
+            memories_df.groupby(days, sort=True)["success"]
+            .agg(["sum", "count"])
+            .rename(columns={"sum": "Successful", "count": "Total"})
+            .reset_index()
+        )
+        day_df["Success Rate"] = day_df["Successful"] / day_df["Total"] * 100
 
         # Create a line chart
         fig = px.line(
@@ -182,18 +294,9 @@ elif page == "Memory Analysis":
     # Rule success rates
     st.subheader("Rule Success Rates")
 
-    rules = memory_stats.get("rules", {})
-    if rules:
-        rule_data = []
-        for rule, stats in rules.items():
-            success_rate = stats["successful"] / stats["total"] if stats["total"] > 0 else 0
-            rule_data.append({
-                "Rule": rule,
-                "Success Rate": success_rate * 100,
-                "Total": stats["total"]
-            })
-
-        rule_df = pd.DataFrame(rule_data)
+    rule_df = _rule_counts(memories_df)
+    if not rule_df.empty:
+        rule_df["Success Rate"] = rule_df["Successful"] / rule_df["Total"] * 100
 
         # Create a bar chart
         fig = px.bar(
@@ -214,9 +317,9 @@ elif page == "Memory Analysis":
     st.subheader("Memory Usage")
 
     # Count how many fixes used memory
-    memory_usage_count = sum(1 for m in memory.memories if hasattr(m, "used_memory") and m.used_memory)
+    memory_usage_count = int(memories_df["used_memory"].astype(bool).sum())
     # Safely handle empty memory list
-    total_memories = max(1, len(memory.memories))
+    total_memories = max(1, len(memories_df))
 
     if total_memories > 0:
         memory_usage_rate = memory_usage_count / total_memories
@@ -242,11 +345,16 @@ elif page == "Memory Analysis":
         st.info("No memory usage data available yet.")
 
 # Feedback Analysis page
-elif page == "Feedback Analysis":
+@st.fragment
+def feedback_page(memory, feedback_manager):
+    """Render the Feedback Analysis page."""
+    import plotly.express as px
+    _reload_managers(memory, feedback_manager)
+
     st.header("Feedback Analysis")
 
     # Get feedback statistics
-    feedback_stats = feedback_manager.get_feedback_stats()
+    feedback_stats = _cached_feedback_stats(feedback_manager, feedback_manager.feedback_file, _file_mtime(feedback_manager.feedback_file))
 
     # Feedback overview
     st.subheader("Feedback Overview")
@@ -268,18 +376,16 @@ elif page == "Feedback Analysis":
 
     sources = feedback_stats.get("sources", {})
     if sources:
-        source_data = []
-        for source, stats in sources.items():
-            positive_rate = stats["positive"] / stats["total"] if stats["total"] > 0 else 0
-            source_data.append({
-                "Source": source,
-                "Total": stats["total"],
-                "Positive": stats["positive"],
-                "Negative": stats["total"] - stats["positive"],
-                "Positive Rate": positive_rate * 100
-            })
-
-        source_df = pd.DataFrame(source_data)
+        # Build the columns directly rather than a dict per source
+        totals = pd.Series([stats["total"] for stats in sources.values()], dtype="int64")
+        positives = pd.Series([stats["positive"] for stats in sources.values()], dtype="int64")
+        source_df = pd.DataFrame({
+            "Source": list(sources),
+            "Total": totals,
+            "Positive": positives,
+            "Negative": totals - positives,
+            "Positive Rate": positives / totals * 100  # every source has at least one item
+        })
 
         # Create a stacked bar chart
         fig = px.bar(
@@ -299,7 +405,7 @@ elif page == "Feedback Analysis":
     st.subheader("Recent Feedback")
 
     # Get recent feedback
-    recent_feedback = sorted(feedback_manager.feedback_items, key=lambda f: f.timestamp, reverse=True)[:10]
+    recent_feedback = heapq.nlargest(10, feedback_manager.feedback_items, key=lambda f: f.timestamp)
 
     if recent_feedback:
         for feedback in recent_feedback:
@@ -311,12 +417,12 @@ elif page == "Feedback Analysis":
     else:
         st.info("No recent feedback available yet.")
 
-# Agent Interactions page
-elif page == "Agent Interactions":
-    st.header("Agent Interactions")
-
-    # Agent interaction diagram
-    st.subheader("Agent Interaction Diagram")
+# The Agent Interactions figures are static, so they are built once (once a
+# day for the timeline) and cached as Plotly JSON
+@st.cache_data
+def _interaction_flow_json():
+    """Build the agent interaction Sankey diagram as Plotly JSON."""
+    import plotly.graph_objects as go
 
     # Create a Sankey diagram to visualize agent interactions
     fig = go.Figure(go.Sankey(
@@ -338,10 +444,12 @@ elif page == "Agent Interactions":
     ))
 
     fig.update_layout(title_text="Agent Interaction Flow", font_size=12)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig.to_json()
 
-    # Agent performance
-    st.subheader("Agent Performance")
+@st.cache_data
+def _agent_performance_json():
+    """Build the agent performance radar chart as Plotly JSON."""
+    import plotly.graph_objects as go
 
     # Create a radar chart for agent performance metrics
     categories = ["Speed", "Accuracy", "Memory Usage", "Feedback Integration", "Code Quality"]
@@ -378,14 +486,12 @@ elif page == "Agent Interactions":
         ),
         showlegend=True
     )
+    return fig.to_json()
 
-    st.plotly_chart(fig, use_container_width=True)
-
-    # Agent activity timeline
-    st.subheader("Agent Activity Timeline")
-
-    # Create a Gantt chart for agent activity with dynamic dates
-    today = datetime.now().strftime('%Y-%m-%d')
+@st.cache_data(ttl=3600)
+def _agent_timeline_json(today):
+    """Build the agent activity timeline for a day (YYYY-MM-DD) as Plotly JSON."""
+    import plotly.express as px
 
     # Create time intervals based on today's date
     df = pd.DataFrame([
@@ -399,21 +505,54 @@ elif page == "Agent Interactions":
 
     fig = px.timeline(df, x_start="Start", x_end="Finish", y="Task", color="Resource")
     fig.update_layout(xaxis_title="Time", yaxis_title="Agent")
+    return fig.to_json()
+
+# Agent Interactions page
+@st.fragment
+def interactions_page(memory, feedback_manager):
+    """Render the Agent Interactions page."""
+    st.header("Agent Interactions")
+
+    # Agent interaction diagram
+    st.subheader("Agent Interaction Diagram")
+    st.plotly_chart(json.loads(_interaction_flow_json()), use_container_width=True)
+
+    # Agent performance
+    st.subheader("Agent Performance")
+    st.plotly_chart(json.loads(_agent_performance_json()), use_container_width=True)
+
+    # Agent activity timeline
+    st.subheader("Agent Activity Timeline")
+
+    # Create a Gantt chart for agent activity with dynamic dates
+    today = datetime.now().strftime('%Y-%m-%d')
+    st.plotly_chart(json.loads(_agent_timeline_json(today)), use_container_width=True)
+
+# Pages by sidebar label; only the selected page is rendered
+PAGES = {
+    "Overview": overview_page,
+    "Memory Analysis": memory_page,
+    "Feedback Analysis": feedback_page,
+    "Agent Interactions": interactions_page
+}
+
+# Sidebar
+st.sidebar.header("Navigation")
+page = st.sidebar.radio("Go to", list(PAGES))
 
-    st.plotly_chart(fig, use_container_width=True)
+PAGES[page](memory, feedback_manager)
 
 # Run the dashboard
 def run_dashboard():
     """Run the dashboard."""
-    import streamlit.cli as stcli
-    import sys
+    from streamlit.web import bootstrap
 
     # Get the path to this file
     file_path = os.path.abspath(__file__)
 
-    # Run the dashboard
-    sys.argv = ["streamlit", "run", file_path]
-    stcli.main()
+    # Start the server directly instead of going through the streamlit CLI
+    bootstrap.load_config_options(flag_options={})
+    bootstrap.run(file_path, False, [], {})
 
 if __name__ == "__main__":
     run_dashboard()
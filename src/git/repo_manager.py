@@ -2,7 +2,10 @@
 Git repository manager for cloning, branching, committing, and pushing changes.
 """
 import os
+import stat
+import atexit
 import shutil
+import hashlib
 import tempfile
 from git import Repo, GitCommandError
 from retry import retry
@@ -13,12 +16,38 @@ from config import (
     GIT_EMAIL,
     GIT_NAME,
     GIT_MASTER_BRANCH,
-    TEMP_DIR
+    GIT_CACHE_CLONE,
+    TEMP_DIR,
+    WORK_DIR
 )
 from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Answers git's password prompt from the environment, so the password never
+# appears in a URL, in the repository config or on a command line
+ASKPASS_SCRIPT = '#!/bin/sh\nprintf \'%s\\n\' "$AI_SONAR_GIT_PASSWORD"\n'
+
+_askpass_path = None
+
+def _askpass():
+    """
+    Get the path of the askpass script, writing it on first use.
+    
+    Returns:
+        str: Path to the askpass script
+    """
+    global _askpass_path
+    if _askpass_path is None:
+        os.makedirs(TEMP_DIR, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix='askpass-', suffix='.sh', dir=TEMP_DIR)
+        with os.fdopen(fd, 'w') as f:
+            f.write(ASKPASS_SCRIPT)
+        os.chmod(path, stat.S_IRWXU)
+        atexit.register(os.remove, path)
+        _askpass_path = path
+    return _askpass_path
+
 class GitRepoManager:
     """
     Manager for Git repository operations.
@@ -33,6 +62,8 @@ class GitRepoManager:
         self.name = GIT_NAME
         self.master_branch = GIT_MASTER_BRANCH
         self.repo_path = None
+        self.cache_path = None
+        self.branch_name = None
         self.repo = None
         
         # Validate configuration
@@ -40,34 +71,65 @@ class GitRepoManager:
             logger.error("Git repository URL not configured")
             raise ValueError("Git repository URL not configured")
     
-    def clone_repo(self):
+    def clone_repo(self, sparse_paths=None):
         """
-        Clone the Git repository.
+        Check out the Git repository into a fresh working tree under WORK_DIR.
+        
+        With GIT_CACHE_CLONE, a bare clone of the repository is kept under
+        TEMP_DIR across runs and only fetched incrementally; each run gets its
+        own worktree of it, so neither the history nor the object database is
+        copied again. Otherwise a shallow, single-branch, blobless clone of
+        the master branch is made.
+        
+        Args:
+            sparse_paths (list, optional): Directories to check out, besides the
+                files at the top level; the whole tree is checked out if not given
         
         Returns:
-            str: Path to the cloned repository
+            str: Path to the working tree
         """
         # Create a unique directory for this run
-        self.repo_path = tempfile.mkdtemp(dir=TEMP_DIR)
-        logger.info(f"Cloning repository to {self.repo_path}")
+        os.makedirs(WORK_DIR, exist_ok=True)
+        self.repo_path = tempfile.mkdtemp(dir=WORK_DIR)
+        logger.info(f"Checking out repository to {self.repo_path}")
         
         try:
-            # Construct the URL with credentials if provided
-            clone_url = self.repo_url
-            if self.username and self.password:
-                # Extract protocol and rest of the URL
-                protocol, rest = self.repo_url.split('://', 1)
-                clone_url = f"{protocol}://{self.username}:{self.password}@{rest}"
+            clone_url = self._clone_url()
+            
+            # A sparse working tree is checked out once its paths are set
+            checkout_options = ['--no-checkout'] if sparse_paths is not None else []
+            
+            if GIT_CACHE_CLONE:
+                cache = self._update_cache(clone_url)
+                
+                # Check out the latest master branch into a new worktree
+                cache.git.worktree('prune')
+                cache.git.worktree('add', '--force', *checkout_options, '-B', self.master_branch, self.repo_path, f"origin/{self.master_branch}")
+                self.repo = Repo(self.repo_path)
+            else:
+                # Only the tip of the master branch is needed; blobs are fetched on checkout
+                self.repo = Repo.clone_from(
+                    clone_url,
+                    self.repo_path,
+                    env=self._credential_env(),
+                    multi_options=[
+                        '--filter=blob:none',
+                        '--single-branch',
+                        '--branch', self.master_branch,
+                        '--depth=1',
+                        '--no-tags'
+                    ] + checkout_options
+                )
             
-            # Clone the repository
-            self.repo = Repo.clone_from(clone_url, self.repo_path)
+            if sparse_paths is not None:
+                self._sparse_checkout(sparse_paths)
             
             # Configure Git user
             with self.repo.config_writer() as git_config:
                 git_config.set_value('user', 'email', self.email)
                 git_config.set_value('user', 'name', self.name)
             
-            logger.info(f"Repository cloned successfully to {self.repo_path}")
+            logger.info(f"Repository checked out successfully to {self.repo_path}")
             return self.repo_path
         
         except GitCommandError as e:
@@ -75,6 +137,78 @@ class GitRepoManager:
             self.cleanup()
             raise
     
+    def _sparse_checkout(self, sparse_paths):
+        """
+        Check out the master branch with only some directories in the working tree.
+        
+        Args:
+            sparse_paths (list): Directories to check out
+        """
+        self.repo.git.sparse_checkout('init', '--cone')
+        self.repo.git.sparse_checkout('set', *sparse_paths)
+        self.repo.git.checkout(self.master_branch)
+        logger.info(f"Checked out {len(sparse_paths)} directories")
+    
+    def _clone_url(self):
+        """
+        Get the URL to clone from, with the username but not the password.
+        
+        Returns:
+            str: Repository URL
+        """
+        if not (self.username and self.password):
+            return self.repo_url
+        
+        # Extract protocol and rest of the URL
+        protocol, rest = self.repo_url.split('://', 1)
+        return f"{protocol}://{self.username}@{rest}"
+    
+    def _credential_env(self):
+        """
+        Get the environment variables that let git authenticate without prompting.
+        
+        Returns:
+            dict: Environment variables for git commands
+        """
+        if not (self.username and self.password):
+            return {}
+        
+        return {
+            'GIT_ASKPASS': _askpass(),
+            'GIT_TERMINAL_PROMPT': '0',
+            'AI_SONAR_GIT_PASSWORD': self.password
+        }
+    
+    def _update_cache(self, clone_url):
+        """
+        Clone the repository into the cache, or fetch new commits if it is already cached.
+        
+        Args:
+            clone_url (str): Repository URL, including the username if any
+            
+        Returns:
+            Repo: Bare repository in the cache
+        """
+        key = hashlib.sha1(self.repo_url.encode('utf-8')).hexdigest()
+        self.cache_path = os.path.join(TEMP_DIR, f"{key}.git")
+        
+        if not os.path.isdir(self.cache_path):
+            logger.info(f"Cloning repository into cache at {self.cache_path}")
+            cache = Repo.clone_from(clone_url, self.cache_path, bare=True, env=self._credential_env())
+            
+            # Track remote branches under refs/remotes, leaving local branches to the worktrees
+            cache.git.config('remote.origin.fetch', '+refs/heads/*:refs/remotes/origin/*')
+        else:
+            logger.info(f"Updating cached repository at {self.cache_path}")
+            cache = Repo(self.cache_path)
+            
+            # The URL may have changed since the cache was created
+            cache.git.remote('set-url', 'origin', clone_url)
+        
+        cache.git.update_environment(**self._credential_env())
+        cache.git.fetch('--prune', 'origin')
+        return cache
+    
     def create_branch(self, branch_name):
         """
         Create a new branch.
@@ -92,12 +226,37 @@ class GitRepoManager:
             
             # Create and checkout new branch
             self.repo.git.checkout('-b', branch_name)
+            self.branch_name = branch_name
             logger.info(f"Created and checked out branch: {branch_name}")
         
         except GitCommandError as e:
             logger.error(f"Error creating branch {branch_name}: {str(e)}")
             raise
     
+    def tracked_files(self, file_paths):
+        """
+        Find which of several files are tracked in the repository.
+        
+        Runs a single git ls-files for all of them, limited to the given paths.
+        
+        Args:
+            file_paths (list): Paths to the files, relative to the repository root
+            
+        Returns:
+            set: The given paths that are tracked
+        """
+        if not self.repo:
+            logger.error("Repository not cloned yet")
+            raise ValueError("Repository not cloned yet")
+        
+        file_paths = list(dict.fromkeys(file_paths))
+        if not file_paths:
+            return set()
+        
+        # Paths are matched literally rather than as glob patterns
+        output = self.repo.git.ls_files('-z', '--', *file_paths, env={'GIT_LITERAL_PATHSPECS': '1'})
+        return {path for path in output.split('\0') if path}
+    
     def commit_changes(self, file_path, commit_message):
         """
         Commit changes to a file.
@@ -122,6 +281,57 @@ class GitRepoManager:
             logger.error(f"Error committing changes: {str(e)}")
             raise
     
+    def commit_all(self, pending_commits, summary="Fix SonarQube issues"):
+        """
+        Commit the changes for several issues in a single commit.
+        
+        Args:
+            pending_commits (list): (file_path, issue_key, message) tuples for the fixed issues
+            summary (str, optional): First line of the commit message
+        """
+        if not self.repo:
+            logger.error("Repository not cloned yet")
+            raise ValueError("Repository not cloned yet")
+        
+        if not pending_commits:
+            return
+        
+        # List each fixed issue in the commit message body
+        commit_message = f"{summary}\n\n" + "\n".join(
+            f"- {issue_key}: {message}" for _, issue_key, message in pending_commits
+        )
+        
+        self.commit_many([file_path for file_path, _, _ in pending_commits], commit_message)
+        logger.info(f"Committed fixes for {len(pending_commits)} issues")
+    
+    def commit_many(self, file_paths, commit_message):
+        """
+        Commit changes to several files in a single commit.
+        
+        Runs one git add and one git commit, however many files there are.
+        
+        Args:
+            file_paths (list): Paths to the files to commit
+            commit_message (str): Commit message
+        """
+        if not self.repo:
+            logger.error("Repository not cloned yet")
+            raise ValueError("Repository not cloned yet")
+        
+        # Each file only needs staging once
+        file_paths = list(dict.fromkeys(file_paths))
+        if not file_paths:
+            return
+        
+        try:
+            self.repo.git.add('--', *file_paths)
+            self.repo.git.commit('-m', commit_message)
+            logger.info(f"Committed changes to {len(file_paths)} files")
+        
+        except GitCommandError as e:
+            logger.error(f"Error committing changes: {str(e)}")
+            raise
+    
     @retry(tries=3, delay=2, backoff=2, logger=logger)
     def push_branch(self, branch_name):
         """
@@ -135,8 +345,9 @@ class GitRepoManager:
             raise ValueError("Repository not cloned yet")
         
         try:
-            # Push the branch
-            self.repo.git.push('--set-upstream', 'origin', branch_name)
+            # Push the branch, without tracking it in the shared cache's config
+            self.repo.git.update_environment(**self._credential_env())
+            self.repo.git.push('origin', branch_name)
             logger.info(f"Pushed branch {branch_name} to remote")
         
         except GitCommandError as e:
@@ -144,7 +355,29 @@ class GitRepoManager:
             raise
     
     def cleanup(self):
-        """Clean up temporary files."""
+        """Clean up temporary files, keeping the cached repository."""
         if self.repo_path and os.path.exists(self.repo_path):
+            # Only working trees created by clone_repo are ever removed
+            work_dir = os.path.realpath(WORK_DIR)
+            if os.path.commonpath([os.path.realpath(self.repo_path), work_dir]) != work_dir:
+                logger.warning(f"Not removing {self.repo_path}: outside of {WORK_DIR}")
+                return
+            
             logger.info(f"Cleaning up repository at {self.repo_path}")
+            
+            # Detach the worktree from the cached repository
+            if self.cache_path and os.path.isdir(self.cache_path):
+                cache = Repo(self.cache_path)
+                try:
+                    cache.git.worktree('remove', '--force', self.repo_path)
+                except GitCommandError as e:
+                    logger.warning(f"Error removing worktree {self.repo_path}: {str(e)}")
+                
+                # Branches live in the shared cache, so drop this run's branch with its worktree
+                if self.branch_name:
+                    try:
+                        cache.git.branch('-D', self.branch_name)
+                    except GitCommandError as e:
+                        logger.warning(f"Error deleting branch {self.branch_name}: {str(e)}")
+            
             shutil.rmtree(self.repo_path, ignore_errors=True)
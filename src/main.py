@@ -12,20 +12,26 @@ This version uses LangGraph for a multi-agent architecture.
 import os
 import sys
 import argparse
+from typing import Optional
 
 # Add the parent directory to the path so we can import our modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import MAX_ISSUES_PER_RUN
 from src.utils.logger import setup_logger
-from src.workflows.sonar_fixer_workflow import run_workflow
+from src.utils.llm_cache import set_cache_enabled, get_cache_stats
+from src.utils.metrics import set_metrics_enabled, get_metrics_report, dump_metrics
 
 # Set up logger
 logger = setup_logger()
 
-def main():
-    """Main function to run the AI Sonar Issue Fixer workflow."""
-    # Parse command line arguments
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command line argument parser.
+
+    Returns:
+        argparse.ArgumentParser: Parser for the AI Sonar Issue Fixer options
+    """
     parser = argparse.ArgumentParser(description='AI Sonar Issue Fixer')
     parser.add_argument('--max-issues', type=int, default=MAX_ISSUES_PER_RUN,
                         help=f'Maximum number of issues to process (default: {MAX_ISSUES_PER_RUN})')
@@ -35,15 +41,34 @@ def main():
                         help='Number of parallel workers for issue processing (default: 5)')
     parser.add_argument('--no-parallel', action='store_true',
                         help='Disable parallel processing')
-    args = parser.parse_args()
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Disable the LLM response cache')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Print LLM cache statistics and per-stage timings at the end of the run')
+    return parser
+
+def main(args: Optional[argparse.Namespace] = None):
+    """
+    Main function to run the AI Sonar Issue Fixer workflow.
+
+    Args:
+        args: Parsed command line arguments; parsed from sys.argv if not given
+    """
+    if args is None:
+        args = build_parser().parse_args()
 
     use_parallel = not args.no_parallel
+    set_cache_enabled(not args.no_cache)
+    set_metrics_enabled(args.verbose)
 
     logger.info(f"Starting AI Sonar Issue Fixer with max_issues={args.max_issues}, "
                f"days_lookback={args.days_lookback}, parallel_workers={args.parallel_workers}, "
                f"use_parallel={use_parallel}")
 
     try:
+        # Import the workflow after parsing arguments; it loads LangGraph and the agents
+        from src.workflows.sonar_fixer_workflow import run_workflow
+
         # Run the workflow
         final_state = run_workflow(
             max_issues=args.max_issues,
@@ -70,6 +95,22 @@ def main():
             print(f"\nParallel processing time: {final_state.parallel_processing_time:.2f} seconds")
 
         print(f"\nTotal duration: {final_state.duration_seconds:.2f} seconds")
+
+        if args.verbose:
+            cache_stats = get_cache_stats()
+            print(f"LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses"
+                  + ("" if not args.no_cache else " (disabled)"))
+
+            metrics_report = get_metrics_report()
+            if metrics_report:
+                print("\nStage timings:")
+                for stage, stats in metrics_report.items():
+                    print(f"  {stage}: {stats['count']} calls, {stats['total_ms']:.1f} ms total, "
+                          f"{stats['mean_ms']:.1f} ms mean")
+
+                metrics_path = dump_metrics()
+                if metrics_path:
+                    print(f"Timing samples written to {metrics_path}")
         print("=" * 50)
 
         # Exit with appropriate code
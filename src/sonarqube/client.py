@@ -2,12 +2,26 @@
 SonarQube API client for interacting with SonarQube.
 """
 import requests
-from retry import retry
-from config import SONARQUBE_URL, SONARQUBE_TOKEN
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import SONARQUBE_URL, SONARQUBE_TOKEN, RETRY_ATTEMPTS
 from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Connections kept open per host, enough for concurrent page fetches
+POOL_SIZE = 16
+
+# Retried inside the transport, honoring Retry-After on rate limiting
+RETRY_STRATEGY = Retry(
+    total=RETRY_ATTEMPTS,
+    backoff_factor=2,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=('GET', 'POST'),
+    respect_retry_after_header=True,
+    raise_on_status=False
+)
+
 class SonarQubeClient:
     """
     Client for interacting with the SonarQube API.
@@ -29,8 +43,24 @@ class SonarQubeClient:
         if not self.base_url or not self.token:
             logger.error("SonarQube URL or token not configured")
             raise ValueError("SonarQube URL or token not configured")
+        
+        # Reuse connections across requests instead of a new TCP/TLS handshake per call
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=RETRY_STRATEGY)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def close(self):
+        """Close the pooled connections."""
+        session = getattr(self, 'session', None)
+        if session is not None:
+            session.close()
+    
+    def __del__(self):
+        """Close the pooled connections when the client is garbage collected."""
+        self.close()
     
-    @retry(tries=3, delay=2, backoff=2, logger=logger)
     def get(self, endpoint, params=None):
         """
         Make a GET request to the SonarQube API.
@@ -46,7 +76,7 @@ class SonarQubeClient:
         logger.debug(f"Making GET request to {url}")
         
         try:
-            response = requests.get(url, params=params, auth=self.auth, timeout=30)
+            response = self.session.get(url, params=params, timeout=30)
             response.raise_for_status()
             return response.json()
         
@@ -54,7 +84,6 @@ class SonarQubeClient:
             logger.error(f"Error making request to SonarQube API: {str(e)}")
             raise
     
-    @retry(tries=3, delay=2, backoff=2, logger=logger)
     def post(self, endpoint, data=None, params=None):
         """
         Make a POST request to the SonarQube API.
@@ -71,7 +100,7 @@ class SonarQubeClient:
         logger.debug(f"Making POST request to {url}")
         
         try:
-            response = requests.post(url, json=data, params=params, auth=self.auth, timeout=30)
+            response = self.session.post(url, json=data, params=params, timeout=30)
             response.raise_for_status()
             
             # Some SonarQube endpoints return empty responses
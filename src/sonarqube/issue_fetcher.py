@@ -1,7 +1,8 @@
 """
 Module for fetching and filtering SonarQube issues.
 """
-import time
+import math
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import requests
 from config import SONARQUBE_PROJECT_KEY
@@ -10,6 +11,11 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
+# SonarQube's issues/search returns at most this many results per query
+SEARCH_RESULT_LIMIT = 10000
+SHARD_PAGE_SIZE = 500  # Maximum page size allowed by SonarQube API
+PAGE_FETCH_WORKERS = 8  # Pages of search results fetched concurrently
+
 class SonarQubeIssueFetcher:
     """
     Class for fetching and filtering SonarQube issues.
@@ -30,6 +36,25 @@ class SonarQubeIssueFetcher:
         Returns:
             list: List of new issues
         """
+        issues = list(self.iter_new_issues(max_issues=max_issues, days=days))
+
+        logger.info(f"Fetched {len(issues)} new issues from SonarQube")
+        return issues
+
+    def iter_new_issues(self, max_issues=50, days=1):
+        """
+        Iterate over new issues from SonarQube, fetching one page at a time.
+
+        Issues from a page are yielded before the next page is requested, so
+        callers can start working on them while the rest are fetched.
+
+        Args:
+            max_issues (int, optional): Maximum number of issues to fetch
+            days (int, optional): Number of days to look back for new issues
+
+        Yields:
+            dict: New issue
+        """
         # Calculate the date from which to fetch issues
         # Add timezone info to avoid issues with SonarQube API
         created_date = datetime.now() - timedelta(days=days)
@@ -41,16 +66,13 @@ class SonarQubeIssueFetcher:
             created_after = created_date.strftime("%Y-%m-%dT%H:%M:%S+0000")
 
         # Fetch issues from SonarQube
-        issues = self._fetch_issues(
+        yield from self._iter_issues(
             project_key=SONARQUBE_PROJECT_KEY,
             statuses="OPEN",
             created_after=created_after,
             max_issues=max_issues
         )
 
-        logger.info(f"Fetched {len(issues)} new issues from SonarQube")
-        return issues
-
     def fetch_issues_since_last_build(self, jenkins_client, max_issues=50):
         """
         Fetch issues created since the last successful Jenkins build.
@@ -102,44 +124,162 @@ class SonarQubeIssueFetcher:
         Returns:
             list: List of issues
         """
-        all_issues = []
-        page = 1
+        return list(self._iter_issues(project_key, statuses, created_after, max_issues))
+
+    def _iter_issues(self, project_key, statuses="OPEN", created_after=None, max_issues=50):
+        """
+        Iterate over issues from SonarQube, one page at a time.
+
+        The first page reports the total number of issues, so the remaining
+        pages are requested concurrently while the first page is consumed.
+        Pages are still yielded in order.
+
+        Args:
+            project_key (str): SonarQube project key
+            statuses (str, optional): Issue statuses to filter by
+            created_after (str, optional): ISO date to filter issues created after
+            max_issues (int, optional): Maximum number of issues to yield
+
+        Yields:
+            dict: Issue
+        """
+        if max_issues <= 0:
+            return
+
         page_size = 100  # Maximum allowed by SonarQube API
+        params = {
+            'componentKeys': project_key,
+            'statuses': statuses,
+            'ps': page_size,
+            's': 'CREATION_DATE',
+            'asc': 'false'  # Get newest issues first
+        }
 
-        while len(all_issues) < max_issues:
-            params = {
-                'componentKeys': project_key,
-                'statuses': statuses,
-                'p': page,
-                'ps': page_size,
-                's': 'CREATION_DATE',
-                'asc': 'false'  # Get newest issues first
-            }
+        if created_after:
+            params['createdAfter'] = created_after
 
-            if created_after:
-                params['createdAfter'] = created_after
+        def fetch_page(page):
+            return self.client.get('issues/search', params=dict(params, p=page))
 
-            try:
-                response = self.client.get('issues/search', params=params)
-                issues = response.get('issues', [])
+        try:
+            response = fetch_page(1)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching issues: {str(e)}")
+            return
+
+        issues = response.get('issues', [])
+
+        # Work out how many pages are needed from the total reported by the first page
+        total = response.get('paging', {}).get('total', response.get('total', 0))
+        num_pages = math.ceil(min(total, max_issues, SEARCH_RESULT_LIMIT) / page_size)
+
+        if num_pages <= 1 or len(issues) < page_size:
+            yield from issues[:max_issues]
+            return
 
-                if not issues:
-                    break
+        with ThreadPoolExecutor(max_workers=min(PAGE_FETCH_WORKERS, num_pages - 1)) as executor:
+            pages = executor.map(fetch_page, range(2, num_pages + 1))
 
-                all_issues.extend(issues)
+            yield from issues
+            remaining = max_issues - len(issues)
 
-                # Check if we've reached the last page
-                if len(issues) < page_size:
-                    break
+            try:
+                for response in pages:
+                    page_issues = response.get('issues', [])
 
-                page += 1
+                    # Limit to max_issues
+                    yield from page_issues[:remaining]
+                    remaining -= len(page_issues)
 
-                # Add a small delay to avoid rate limiting
-                time.sleep(0.5)
+                    if remaining <= 0 or len(page_issues) < page_size:
+                        break
 
             except requests.exceptions.RequestException as e:
                 logger.error(f"Error fetching issues: {str(e)}")
+
+    def fetch_all_sharded(self, project_key=SONARQUBE_PROJECT_KEY, statuses="OPEN", created_after=None, max_workers=4):
+        """
+        Fetch all matching issues, sharding the search by rule.
+
+        SonarQube caps a single search at 10,000 results, so the active rules
+        are listed with a facet query first and each rule is paged
+        separately, with the rules fetched concurrently.
+
+        Args:
+            project_key (str, optional): SonarQube project key
+            statuses (str, optional): Issue statuses to filter by
+            created_after (str, optional): ISO date to filter issues created after
+            max_workers (int, optional): Number of rules fetched concurrently
+
+        Returns:
+            list: List of issues, without duplicates
+        """
+        params = {
+            'componentKeys': project_key,
+            'statuses': statuses
+        }
+        if created_after:
+            params['createdAfter'] = created_after
+
+        # List the rules with matching issues
+        try:
+            response = self.client.get('issues/search', params=dict(params, facets='rules', ps=1))
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching rule facets: {str(e)}")
+            return []
+
+        rules = [
+            value['val']
+            for facet in response.get('facets', [])
+            if facet.get('property') == 'rules'
+            for value in facet.get('values', [])
+        ]
+        logger.info(f"Fetching issues for {len(rules)} rules with {max_workers} workers")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            shards = list(executor.map(lambda rule: self._fetch_rule_issues(params, rule), rules))
+
+        # An issue can be reported under more than one shard
+        issues_by_key = {}
+        for shard in shards:
+            for issue in shard:
+                issues_by_key.setdefault(issue['key'], issue)
+
+        logger.info(f"Fetched {len(issues_by_key)} issues across {len(rules)} rules")
+        return list(issues_by_key.values())
+
+    def _fetch_rule_issues(self, params, rule):
+        """
+        Fetch all issues for a single rule, page by page.
+
+        Args:
+            params (dict): Search parameters shared by all rules
+            rule (str): Rule key
+
+        Returns:
+            list: List of issues for the rule
+        """
+        issues = []
+        page = 1
+
+        while True:
+            try:
+                response = self.client.get('issues/search', params=dict(params, rules=rule, p=page, ps=SHARD_PAGE_SIZE))
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error fetching issues for rule {rule}: {str(e)}")
+                break
+
+            page_issues = response.get('issues', [])
+            issues.extend(page_issues)
+
+            total = response.get('paging', {}).get('total', response.get('total', 0))
+            if total > SEARCH_RESULT_LIMIT and page == 1:
+                logger.warning(f"Rule {rule} has {total} issues; only the first {SEARCH_RESULT_LIMIT} can be fetched")
+
+            # Stop at the last page or at the search result limit
+            if not page_issues or page * SHARD_PAGE_SIZE >= min(total, SEARCH_RESULT_LIMIT):
                 break
 
-        # Limit to max_issues
-        return all_issues[:max_issues]
+            page += 1
+
+        return issues
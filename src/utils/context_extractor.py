@@ -2,15 +2,76 @@
 Utility for extracting code context from files.
 """
 import os
+import mmap
+from functools import lru_cache
 from config import CONTEXT_LINES_BEFORE, CONTEXT_LINES_AFTER
 from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Number of extracted contexts kept in memory
+CONTEXT_CACHE_SIZE = 1024
+
+def _skip_lines(mapped, offset, count):
+    """
+    Find where a line starts in a memory-mapped file.
+
+    Args:
+        mapped (mmap.mmap): Memory-mapped file
+        offset (int): Byte offset of the line to start from
+        count (int): Number of lines to skip
+
+    Returns:
+        tuple: Byte offset after the skipped lines and the number of lines
+            skipped, which is smaller than count if the file ends first
+    """
+    for skipped in range(count):
+        if offset >= len(mapped):
+            return offset, skipped
+        position = mapped.find(b'\n', offset)
+        offset = len(mapped) if position < 0 else position + 1
+    return offset, count
+
+def _read_window(file, start_index, count):
+    """
+    Read a range of lines from a file without reading the rest of it.
+
+    Args:
+        file: Binary file object
+        start_index (int): First line to read (0-based)
+        count (int): Number of lines to read
+
+    Returns:
+        tuple: The lines as bytes, the number of lines before them and the
+            number of lines read, either of which is smaller than requested
+            if the file ends first
+    """
+    # Empty files can't be memory-mapped
+    if os.fstat(file.fileno()).st_size == 0:
+        return b'', 0, 0
+
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        start, skipped = _skip_lines(mapped, 0, start_index)
+        end, read = _skip_lines(mapped, start, count)
+        return mapped[start:end], skipped, read
+
+def _split_lines(text):
+    """Split text into a tuple of lines, keeping the line endings like readlines()."""
+    lines = [line + '\n' for line in text.split('\n')]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return tuple(lines)
+
 def extract_code_context(file_path, line_number, context_before=None, context_after=None):
     """
     Extract code context from a file around a specific line number.
 
+    The file is memory-mapped and only the lines of the context are decoded,
+    so the cost doesn't depend on the size of the file. Contexts are cached
+    by file version, so issues in the same file don't read it again until
+    it changes.
+
     Args:
         file_path (str): Path to the file
         line_number (int): Line number to extract context around
@@ -26,39 +87,60 @@ def extract_code_context(file_path, line_number, context_before=None, context_af
     if context_after is None:
         context_after = CONTEXT_LINES_AFTER
 
-    if not os.path.exists(file_path):
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
         return None
+    except OSError as e:
+        logger.error(f"Error extracting context from {file_path}: {str(e)}")
+        return None
 
-    try:
-        # Try to open with utf-8 encoding first
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-        except UnicodeDecodeError:
-            # If utf-8 fails, try with latin-1 which should handle any byte sequence
-            logger.warning(f"UTF-8 decoding failed for {file_path}, trying with latin-1")
-            with open(file_path, 'r', encoding='latin-1') as file:
-                lines = file.readlines()
+    # Fixes replace the file, so the inode identifies its version along with
+    # the modification time and size
+    context = _cached_context(
+        file_path, stat.st_ino, stat.st_mtime_ns, stat.st_size,
+        line_number, context_before, context_after
+    )
+    if context is None:
+        return None
+
+    # Callers may narrow the context in place; the lines are an immutable tuple
+    return dict(context)
 
+@lru_cache(maxsize=CONTEXT_CACHE_SIZE)
+def _cached_context(file_path, inode, mtime_ns, size, line_number, context_before, context_after):
+    """Extract the context for a version of a file; see extract_code_context."""
+    try:
         # Convert to 0-based indexing
         line_index = line_number - 1
 
-        # Calculate start and end indices
+        # Calculate the start index and the number of lines in the context
         start_index = max(0, line_index - context_before)
-        end_index = min(len(lines) - 1, line_index + context_after)
+        count = max(0, line_index + context_after - start_index + 1)
+
+        with open(file_path, 'rb') as file:
+            window, lines_before, lines_read = _read_window(file, start_index, count)
+
+        # Try utf-8 first
+        try:
+            context_text = window.decode('utf-8')
+        except UnicodeDecodeError:
+            # If utf-8 fails, use latin-1 which should handle any byte sequence
+            logger.warning(f"UTF-8 decoding failed for {file_path}, trying with latin-1")
+            context_text = window.decode('latin-1')
 
-        # Extract the context lines
-        context_lines = lines[start_index:end_index + 1]
+        # Line endings are normalized as when reading in text mode
+        context_text = context_text.replace('\r\n', '\n')
+        context_lines = _split_lines(context_text)
 
         # Create a context object
         context = {
             'file_path': file_path,
             'target_line': line_number,
             'start_line': start_index + 1,  # Convert back to 1-based indexing
-            'end_line': end_index + 1,      # Convert back to 1-based indexing
-            'context_text': ''.join(context_lines),
-            'all_lines': lines,
+            'end_line': lines_before + lines_read,
+            'context_text': context_text,
             'context_lines': context_lines,
         }
 
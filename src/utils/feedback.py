@@ -2,12 +2,15 @@
 Feedback module for collecting and processing feedback on fixes.
 """
 import os
-import json
 import time
+import threading
+from collections import Counter
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 from src.utils.logger import setup_logger
+from src.utils.json_utils import dump_bytes
+from src.utils.record_file import BufferedRecordWriter, load_records
 from src.utils.memory import AgentMemory, FixMemory
 
 logger = setup_logger()
@@ -25,7 +28,7 @@ class FeedbackManager:
     Manager for collecting and processing feedback on fixes.
     """
 
-    def __init__(self, feedback_file: str = "feedback.json", memory: Optional[AgentMemory] = None):
+    def __init__(self, feedback_file: str = "feedback.jsonl", memory: Optional[AgentMemory] = None):
         """
         Initialize the feedback manager.
 
@@ -45,30 +48,74 @@ class FeedbackManager:
         os.makedirs(os.path.dirname(self.feedback_file), exist_ok=True)
 
         self.feedback_items: List[FeedbackItem] = []
+
+        # Feedback items indexed by issue key, and per-source counts kept up to
+        # date on every change for get_feedback_stats
+        self._by_issue: Dict[str, List[FeedbackItem]] = {}
+        self._source_totals: Counter = Counter()
+        self._source_positive: Counter = Counter()
+
         self.memory = memory or AgentMemory()
+
+        # Feedback may be recorded from several threads at once
+        self._lock = threading.RLock()
+
+        # New feedback is appended to the feedback file in batches
+        self._writer = BufferedRecordWriter(self.feedback_file)
+
         self.load_feedback()
 
     def load_feedback(self):
-        """Load feedback from the feedback file."""
-        if os.path.exists(self.feedback_file):
-            try:
-                with open(self.feedback_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.feedback_items = [FeedbackItem(**item) for item in data]
-                logger.info(f"Loaded {len(self.feedback_items)} feedback items from {self.feedback_file}")
-            except Exception as e:
-                logger.error(f"Error loading feedback from {self.feedback_file}: {str(e)}")
-                self.feedback_items = []
+        """Load feedback from the feedback file, one JSON record per line."""
+        try:
+            self.feedback_items = load_records(self.feedback_file, FeedbackItem)
+            self._rebuild_index()
+            logger.info(f"Loaded {len(self.feedback_items)} feedback items from {self.feedback_file}")
+        except Exception as e:
+            logger.error(f"Error loading feedback from {self.feedback_file}: {str(e)}")
+            self.feedback_items = []
+            self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Rebuild the issue key index and the counts."""
+        self._by_issue = {}
+        self._source_totals = Counter()
+        self._source_positive = Counter()
+        for item in self.feedback_items:
+            self._index_item(item)
+
+    def _index_item(self, item: FeedbackItem):
+        """Add a feedback item to the index and the counts."""
+        self._by_issue.setdefault(item.issue_key, []).append(item)
+        self._source_totals[item.source] += 1
+        if item.success:
+            self._source_positive[item.source] += 1
 
     def save_feedback(self):
-        """Save feedback to the feedback file."""
+        """Rewrite the feedback file with every feedback item."""
         try:
-            with open(self.feedback_file, 'w', encoding='utf-8') as f:
-                json.dump([item.dict() for item in self.feedback_items], f, indent=2)
+            with self._lock:
+                self._writer.rewrite(self.feedback_items)
             logger.info(f"Saved {len(self.feedback_items)} feedback items to {self.feedback_file}")
         except Exception as e:
             logger.error(f"Error saving feedback to {self.feedback_file}: {str(e)}")
 
+    def export(self, export_file: str, pretty: bool = True):
+        """
+        Write the feedback items to another file, indented for reading by default.
+
+        The feedback file itself is written compactly.
+
+        Args:
+            export_file: Path to the file to write
+            pretty: Whether to indent the JSON
+        """
+        with self._lock:
+            payload = dump_bytes(self.feedback_items, indent=pretty)
+        with open(export_file, 'wb') as f:
+            f.write(payload)
+        logger.info(f"Exported {len(self.feedback_items)} feedback items to {export_file}")
+
     def add_feedback(self, feedback: FeedbackItem):
         """
         Add feedback.
@@ -76,8 +123,12 @@ class FeedbackManager:
         Args:
             feedback: Feedback to add
         """
-        self.feedback_items.append(feedback)
-        self.save_feedback()
+        with self._lock:
+            self.feedback_items.append(feedback)
+            self._index_item(feedback)
+
+            # Only the new item is written, together with others added around the same time
+            self._writer.append(feedback)
 
         # Update memory with feedback
         if self.memory:
@@ -97,7 +148,7 @@ class FeedbackManager:
         Returns:
             List of feedback items
         """
-        return [item for item in self.feedback_items if item.issue_key == issue_key]
+        return list(self._by_issue.get(issue_key, ()))
 
     def get_feedback_stats(self) -> Dict[str, Any]:
         """
@@ -106,18 +157,13 @@ class FeedbackManager:
         Returns:
             Dictionary of statistics
         """
-        total_feedback = len(self.feedback_items)
-        positive_feedback = sum(1 for item in self.feedback_items if item.success)
-
-        sources = {}
-        for item in self.feedback_items:
-            source = item.source
-            if source not in sources:
-                sources[source] = {"total": 0, "positive": 0}
-
-            sources[source]["total"] += 1
-            if item.success:
-                sources[source]["positive"] += 1
+        with self._lock:
+            total_feedback = len(self.feedback_items)
+            positive_feedback = sum(self._source_positive.values())
+            sources = {
+                source: {"total": total, "positive": self._source_positive[source]}
+                for source, total in self._source_totals.items()
+            }
 
         return {
             "total_feedback": total_feedback,
@@ -144,16 +190,13 @@ class FeedbackManager:
             success = False
         else:
             # Check if the fix is minimal (less than 20% change)
-            original_lines = original_code.strip().split('\n')
-            fixed_lines = fixed_code.strip().split('\n')
+            # Count lines without splitting the code into a list
+            original_line_count = original_code.strip().count('\n') + 1
+            fixed_line_count = fixed_code.strip().count('\n') + 1
 
             # Calculate the difference in line count
-            line_diff = abs(len(fixed_lines) - len(original_lines))
-            # Avoid division by zero
-            if not original_lines:
-                line_diff_percent = 1.0 if line_diff > 0 else 0.0
-            else:
-                line_diff_percent = line_diff / len(original_lines)
+            line_diff = abs(fixed_line_count - original_line_count)
+            line_diff_percent = line_diff / original_line_count
 
             if line_diff_percent > 0.2:
                 feedback_text = f"The fix changed {line_diff_percent:.0%} of the code, which is more than expected."
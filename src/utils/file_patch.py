@@ -0,0 +1,133 @@
+"""
+Utility for replacing ranges of lines in a file without loading it into memory.
+"""
+import os
+import mmap
+import shutil
+import tempfile
+
+def _skip_lines(mapped, offset, count):
+    """
+    Find where a line starts in a memory-mapped file.
+
+    Args:
+        mapped (mmap.mmap): Memory-mapped file
+        offset (int): Byte offset of the line to start from
+        count (int): Number of lines to skip
+
+    Returns:
+        int: Byte offset after skipping the lines, or the file size if the file ends first
+    """
+    for _ in range(count):
+        position = mapped.find(b'\n', offset)
+        if position < 0:
+            return len(mapped)
+        offset = position + 1
+    return offset
+
+def replace_lines(file_path, start_line, end_line, new_text, encoding='utf-8'):
+    """
+    Replace lines start_line..end_line (1-based, inclusive) of a file with new text.
+
+    The file is memory-mapped and the line boundaries are located in the
+    mapping, so no per-line objects are created; the unchanged parts are
+    written straight from the mapping into a temporary file in the same
+    directory, which then atomically replaces the original. Memory use does
+    not depend on the file size and a failure never leaves a partially
+    written file.
+
+    Args:
+        file_path (str): Path to the file
+        start_line (int): First line to replace (1-based)
+        end_line (int): Last line to replace (1-based, inclusive)
+        new_text (str): Text to put in place of the lines
+        encoding (str, optional): Encoding used for the new text
+    """
+    replace_line_ranges(file_path, [(start_line, end_line, new_text)], encoding)
+
+def replace_line_ranges(file_path, ranges, encoding='utf-8'):
+    """
+    Replace several ranges of lines of a file in a single pass.
+
+    Line numbers refer to the file before any replacement, so each range is
+    replaced where it was found whatever the others do to the line count.
+    Ranges overlapping one that starts earlier are left out. The file is
+    written once, as in replace_lines.
+
+    Args:
+        file_path (str): Path to the file
+        ranges (list): (start_line, end_line, new_text) tuples, with 1-based,
+            inclusive line numbers, in any order
+        encoding (str, optional): Encoding used for the new text
+
+    Returns:
+        list: Whether each range was replaced, in the order given
+    """
+    # Ranges are applied from the top of the file down
+    order = sorted(range(len(ranges)), key=lambda i: (ranges[i][0], ranges[i][1]))
+    applied = [False] * len(ranges)
+    replacements = []
+    next_line = 1
+    for i in order:
+        start_line, end_line, new_text = ranges[i]
+        start_line = max(1, start_line)
+        if start_line < next_line:
+            continue
+        replacements.append((start_line, end_line, new_text.encode(encoding)))
+        applied[i] = True
+        next_line = max(start_line, end_line + 1)
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+
+    with open(file_path, 'rb') as source:
+        target = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+        try:
+            with target:
+                if os.fstat(source.fileno()).st_size:
+                    with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        _write_replaced(mapped, target, replacements)
+                else:
+                    # Empty files can't be memory-mapped
+                    _write_replaced(b'', target, replacements)
+
+            shutil.copymode(file_path, target.name)
+            os.replace(target.name, file_path)
+
+        except BaseException:
+            os.unlink(target.name)
+            raise
+
+    return applied
+
+def _keep_next_line(replacement, ended_with_newline):
+    """Keep the line following the range on its own line."""
+    if ended_with_newline and replacement and not replacement.endswith(b'\n'):
+        return replacement + b'\n'
+    return replacement
+
+def _write_replaced(data, target, replacements):
+    """
+    Write data to the target with line ranges replaced.
+
+    Args:
+        data: File contents, as a memory map or bytes
+        target: Binary file object to write to
+        replacements (list): Sorted, non-overlapping (start_line, end_line,
+            replacement) tuples, with the replacements as bytes
+    """
+    with memoryview(data) as view:
+        # Byte offset and number of the line the scan has reached
+        offset = 0
+        line = 1
+
+        for start_line, end_line, replacement in replacements:
+            start = _skip_lines(data, offset, start_line - line)
+            end = _skip_lines(data, start, end_line - start_line + 1)
+            ended_with_newline = end == start or data[end - 1] == ord('\n')
+
+            target.write(view[offset:start])
+            target.write(_keep_next_line(replacement, ended_with_newline))
+            offset = end
+            line = max(start_line, end_line + 1)
+
+        target.write(view[offset:])
@@ -0,0 +1,167 @@
+"""
+Utility for extracting JSON from LLM responses and serializing JSON.
+"""
+import json
+from typing import Any, Optional
+
+def _default(obj: Any) -> Any:
+    """
+    Convert objects the JSON encoders don't support, such as Pydantic models.
+
+    Args:
+        obj (Any): Object to convert
+
+    Returns:
+        Any: JSON-serializable data
+
+    Raises:
+        TypeError: If the object can't be converted
+    """
+    model_dump = getattr(obj, 'model_dump', None)
+    if model_dump is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return model_dump()
+
+try:
+    import orjson
+
+    loads = orjson.loads
+
+    def dump_bytes(data: Any, indent: bool = False) -> bytes:
+        """
+        Serialize data to UTF-8 encoded JSON.
+
+        Args:
+            data (Any): Data to serialize
+            indent (bool, optional): Whether to indent with two spaces
+
+        Returns:
+            bytes: JSON text encoded as UTF-8
+        """
+        return orjson.dumps(data, default=_default, option=orjson.OPT_INDENT_2 if indent else 0)
+
+    def dumps(data: Any, indent: bool = False) -> str:
+        """
+        Serialize data to a JSON string.
+
+        Args:
+            data (Any): Data to serialize
+            indent (bool, optional): Whether to indent with two spaces
+
+        Returns:
+            str: JSON text
+        """
+        return orjson.dumps(data, default=_default, option=orjson.OPT_INDENT_2 if indent else 0).decode('utf-8')
+except ImportError:
+    loads = json.loads
+
+    def dump_bytes(data: Any, indent: bool = False) -> bytes:
+        """
+        Serialize data to UTF-8 encoded JSON.
+
+        Args:
+            data (Any): Data to serialize
+            indent (bool, optional): Whether to indent with two spaces
+
+        Returns:
+            bytes: JSON text encoded as UTF-8
+        """
+        return json.dumps(data, default=_default, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+    def dumps(data: Any, indent: bool = False) -> str:
+        """
+        Serialize data to a JSON string.
+
+        Args:
+            data (Any): Data to serialize
+            indent (bool, optional): Whether to indent with two spaces
+
+        Returns:
+            str: JSON text
+        """
+        return json.dumps(data, default=_default, indent=2 if indent else None, ensure_ascii=False)
+
+_FENCE_START = '```json'
+_FENCE_END = '```'
+
+def _scan_braces(text: str) -> Optional[str]:
+    """
+    Find the first balanced {...} object in a text.
+
+    Scans the text once, tracking brace depth and skipping braces inside
+    string literals, so the cost is linear in the length of the text.
+
+    Args:
+        text (str): Text to scan
+
+    Returns:
+        str: The JSON object text, or None if there is no balanced object
+    """
+    start = text.find('{')
+    if start < 0:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+
+    for index in range(start, len(text)):
+        char = text[index]
+
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+
+    return None
+
+def find_json_block(text: str) -> Optional[str]:
+    """
+    Find the JSON text in an LLM response.
+
+    A ```json fenced block is preferred; otherwise the first balanced {...}
+    object in the response is used.
+
+    Args:
+        text (str): LLM response
+
+    Returns:
+        str: The JSON text, or None if the response contains no JSON
+    """
+    start = text.find(_FENCE_START)
+    if start >= 0:
+        start += len(_FENCE_START)
+        end = text.find(_FENCE_END, start)
+        if end >= 0:
+            return text[start:end].strip()
+
+    return _scan_braces(text)
+
+def extract_json(text: str) -> Optional[Any]:
+    """
+    Extract and parse the JSON in an LLM response.
+
+    Args:
+        text (str): LLM response
+
+    Returns:
+        Any: The parsed JSON, or None if the response contains no JSON
+
+    Raises:
+        ValueError: If the JSON text is malformed
+    """
+    block = find_json_block(text)
+    if block is None:
+        return None
+    return loads(block)
@@ -0,0 +1,39 @@
+"""
+Shared Gemini LLM client.
+"""
+from functools import lru_cache
+from typing import Any
+from config import GEMINI_API_KEY
+
+@lru_cache(maxsize=None)
+def get_llm(
+    model: str = "gemini-pro",
+    temperature: float = 0.2,
+    top_p: float = 0.95,
+    max_output_tokens: int = 2048
+) -> Any:
+    """
+    Get the LLM client for a set of generation settings.
+
+    Clients are created once per distinct settings and shared by every agent
+    that asks for them, so agents reuse the same underlying HTTP connections.
+
+    Args:
+        model (str): Gemini model name
+        temperature (float): Sampling temperature
+        top_p (float): Nucleus sampling probability
+        max_output_tokens (int): Maximum number of tokens to generate
+
+    Returns:
+        GoogleGenerativeAI: LangChain LLM
+    """
+    # Imported lazily to keep CLI startup fast
+    from langchain.llms import GoogleGenerativeAI
+
+    return GoogleGenerativeAI(
+        model=model,
+        google_api_key=GEMINI_API_KEY,
+        temperature=temperature,
+        top_p=top_p,
+        max_output_tokens=max_output_tokens
+    )
@@ -0,0 +1,171 @@
+"""
+On-disk cache for LLM responses.
+
+Responses are stored as one file per prompt under TEMP_DIR/llm_cache, keyed by
+the SHA-256 of the caller's namespace, the model name and the prompt, so
+identical prompts within a run or across runs skip the LLM round-trip.
+"""
+import os
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+from config import TEMP_DIR, GEMINI_MAX_CONCURRENCY
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+CACHE_DIR = os.path.join(TEMP_DIR, "llm_cache")
+DEFAULT_TTL = 86400  # seconds
+
+_cache_enabled = True
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+# Caps concurrent LLM requests across all threads and event loops, so parallel
+# workers don't trip Gemini's rate limits and fall into retry storms
+_llm_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+
+# Bounds of the interval between checks for a free slot in async callers
+SLOT_POLL_MIN = 0.01  # seconds
+SLOT_POLL_MAX = 0.2  # seconds
+
+def set_cache_enabled(enabled: bool):
+    """
+    Enable or disable the LLM response cache for this process.
+
+    Args:
+        enabled: Whether cached responses should be used
+    """
+    global _cache_enabled
+    _cache_enabled = enabled
+
+def get_cache_stats() -> Dict[str, int]:
+    """
+    Get cache hit/miss counts for this process.
+
+    Returns:
+        Dictionary with the number of hits and misses
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+def _record(outcome: str):
+    """Count a cache hit or miss."""
+    with _stats_lock:
+        _stats[outcome] += 1
+
+def _cache_path(llm: Any, prompt: str, namespace: str) -> str:
+    """Get the cache file path for a prompt sent to a model by a caller."""
+    model = getattr(llm, 'model', '')
+    key = hashlib.sha256(f"{namespace}|{model}|{prompt}".encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, key[:2], key)
+
+def _read(path: str, ttl: Optional[float]) -> Optional[str]:
+    """Read a cached response, or None if missing or expired."""
+    try:
+        if ttl is not None and time.time() - os.path.getmtime(path) > ttl:
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.warning(f"Error reading LLM cache entry {path}: {str(e)}")
+        return None
+
+def _write(path: str, response: str):
+    """Write a response to the cache atomically."""
+    try:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(response)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"Error writing LLM cache entry {path}: {str(e)}")
+
+def _invoke(llm: Any, prompt: str) -> str:
+    """Invoke the LLM once a request slot is free."""
+    with _llm_slots:
+        return llm.invoke(prompt)
+
+async def _acquire_slot():
+    """
+    Wait for a request slot without blocking the event loop or a thread.
+
+    Parking executor threads on the semaphore would starve the LLM calls
+    that need those threads to finish, so the slot is polled instead;
+    cancelling the wait never leaves a slot taken.
+    """
+    delay = SLOT_POLL_MIN
+    while not _llm_slots.acquire(blocking=False):
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, SLOT_POLL_MAX)
+
+async def _ainvoke(llm: Any, prompt: str) -> str:
+    """Asynchronously invoke the LLM once a request slot is free."""
+    await _acquire_slot()
+    try:
+        return await llm.ainvoke(prompt)
+    finally:
+        _llm_slots.release()
+
+def cached_invoke(llm: Any, prompt: str, namespace: str = "", ttl: Optional[float] = DEFAULT_TTL) -> str:
+    """
+    Invoke the LLM, reusing a cached response for an identical prompt.
+
+    Args:
+        llm: LangChain LLM
+        prompt: Prompt to send
+        namespace: Cache namespace of the caller; bump its version when the prompt or parsing changes
+        ttl: Maximum age of a cached response in seconds, or None for no expiry
+
+    Returns:
+        LLM response
+    """
+    if not _cache_enabled:
+        return _invoke(llm, prompt)
+
+    path = _cache_path(llm, prompt, namespace)
+    cached = _read(path, ttl)
+    if cached is not None:
+        _record("hits")
+        logger.debug(f"LLM cache hit: {os.path.basename(path)}")
+        return cached
+
+    _record("misses")
+    response = _invoke(llm, prompt)
+    _write(path, response)
+    return response
+
+async def acached_invoke(llm: Any, prompt: str, namespace: str = "", ttl: Optional[float] = DEFAULT_TTL) -> str:
+    """
+    Asynchronously invoke the LLM, reusing a cached response for an identical prompt.
+
+    Args:
+        llm: LangChain LLM
+        prompt: Prompt to send
+        namespace: Cache namespace of the caller; bump its version when the prompt or parsing changes
+        ttl: Maximum age of a cached response in seconds, or None for no expiry
+
+    Returns:
+        LLM response
+    """
+    if not _cache_enabled:
+        return await _ainvoke(llm, prompt)
+
+    path = _cache_path(llm, prompt, namespace)
+    cached = _read(path, ttl)
+    if cached is not None:
+        _record("hits")
+        logger.debug(f"LLM cache hit: {os.path.basename(path)}")
+        return cached
+
+    _record("misses")
+    response = await _ainvoke(llm, prompt)
+    _write(path, response)
+    return response
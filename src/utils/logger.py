@@ -6,13 +6,24 @@ import sys
 from loguru import logger
 from config import LOG_LEVEL
 
+# Whether the sinks have been added; every module calls setup_logger at import
+_configured = False
+
 def setup_logger():
     """
     Configure and return a logger instance.
     
+    The sinks are only added on the first call; later calls return the
+    already configured logger.
+    
     Returns:
         loguru.logger: Configured logger instance
     """
+    global _configured
+    if _configured:
+        return logger
+    _configured = True
+    
     # Remove default logger
     logger.remove()
     
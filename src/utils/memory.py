@@ -2,12 +2,16 @@
 Memory module for storing and retrieving agent memories.
 """
 import os
-import json
 import time
-from typing import Dict, List, Any, Optional
+import heapq
+import threading
+from collections import Counter
+from typing import Dict, List, Any, Optional, FrozenSet, Tuple
 from datetime import datetime
 from pydantic import BaseModel, Field
 from src.utils.logger import setup_logger
+from src.utils.json_utils import dump_bytes
+from src.utils.record_file import BufferedRecordWriter, load_records
 
 logger = setup_logger()
 
@@ -30,7 +34,7 @@ class AgentMemory:
     Memory system for agents to store and retrieve previous fixes.
     """
 
-    def __init__(self, memory_file: str = "agent_memory.json"):
+    def __init__(self, memory_file: str = "agent_memory.jsonl"):
         """
         Initialize the agent memory.
 
@@ -49,29 +53,84 @@ class AgentMemory:
         os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
 
         self.memories: List[FixMemory] = []
+
+        # Memories indexed by rule and by issue key, positions of memories indexed
+        # by message word, and cached similar-fix lookups keyed by (rule, message
+        # words, limit); the cache is cleared whenever memories change
+        self._by_rule: Dict[str, List[FixMemory]] = {}
+        self._by_issue: Dict[str, List[FixMemory]] = {}
+        self._by_word: Dict[str, List[int]] = {}
+        self._similar_cache: Dict[Tuple[str, FrozenSet[str], int], List[FixMemory]] = {}
+
+        # Per-rule fix counts, kept up to date on every change for get_memory_stats
+        self._rule_totals: Counter = Counter()
+        self._rule_successful: Counter = Counter()
+
+        # Agents may fix issues from several threads at once
+        self._lock = threading.RLock()
+
+        # New memories are appended to the memory file in batches
+        self._writer = BufferedRecordWriter(self.memory_file)
+
         self.load_memories()
 
     def load_memories(self):
-        """Load memories from the memory file."""
-        if os.path.exists(self.memory_file):
-            try:
-                with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.memories = [FixMemory(**item) for item in data]
-                logger.info(f"Loaded {len(self.memories)} memories from {self.memory_file}")
-            except Exception as e:
-                logger.error(f"Error loading memories from {self.memory_file}: {str(e)}")
-                self.memories = []
+        """Load memories from the memory file, one JSON record per line."""
+        try:
+            self.memories = load_records(self.memory_file, FixMemory)
+            self._rebuild_index()
+            logger.info(f"Loaded {len(self.memories)} memories from {self.memory_file}")
+        except Exception as e:
+            logger.error(f"Error loading memories from {self.memory_file}: {str(e)}")
+            self.memories = []
+            self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Rebuild the rule and word indexes and counts and drop cached lookups."""
+        self._by_rule = {}
+        self._by_issue = {}
+        self._by_word = {}
+        self._rule_totals = Counter()
+        self._rule_successful = Counter()
+        for position, memory in enumerate(self.memories):
+            self._index_memory(position, memory)
+        self._similar_cache.clear()
+
+    def _index_memory(self, position: int, memory: FixMemory):
+        """Add a memory at a position in self.memories to the indexes and counts."""
+        self._by_rule.setdefault(memory.rule, []).append(memory)
+        self._by_issue.setdefault(memory.issue_key, []).append(memory)
+        self._rule_totals[memory.rule] += 1
+        if memory.success:
+            self._rule_successful[memory.rule] += 1
+        for word in set(memory.message.lower().split()):
+            self._by_word.setdefault(word, []).append(position)
 
     def save_memories(self):
-        """Save memories to the memory file."""
+        """Rewrite the memory file with every memory."""
         try:
-            with open(self.memory_file, 'w', encoding='utf-8') as f:
-                json.dump([memory.dict() for memory in self.memories], f, indent=2)
+            with self._lock:
+                self._writer.rewrite(self.memories)
             logger.info(f"Saved {len(self.memories)} memories to {self.memory_file}")
         except Exception as e:
             logger.error(f"Error saving memories to {self.memory_file}: {str(e)}")
 
+    def export(self, export_file: str, pretty: bool = True):
+        """
+        Write the memories to another file, indented for reading by default.
+
+        The memory file itself is written compactly.
+
+        Args:
+            export_file: Path to the file to write
+            pretty: Whether to indent the JSON
+        """
+        with self._lock:
+            payload = dump_bytes(self.memories, indent=pretty)
+        with open(export_file, 'wb') as f:
+            f.write(payload)
+        logger.info(f"Exported {len(self.memories)} memories to {export_file}")
+
     def add_memory(self, memory: FixMemory):
         """
         Add a memory.
@@ -79,8 +138,13 @@ class AgentMemory:
         Args:
             memory: Memory to add
         """
-        self.memories.append(memory)
-        self.save_memories()
+        with self._lock:
+            self._index_memory(len(self.memories), memory)
+            self.memories.append(memory)
+            self._similar_cache.clear()
+
+            # Only the new memory is written, together with others added around the same time
+            self._writer.append(memory)
 
     def get_memories_by_rule(self, rule: str, limit: int = 5) -> List[FixMemory]:
         """
@@ -95,7 +159,7 @@ class AgentMemory:
         """
         # Sort by timestamp (newest first) and filter by rule
         memories = sorted(
-            [m for m in self.memories if m.rule == rule and m.success],
+            [m for m in self._by_rule.get(rule, []) if m.success],
             key=lambda m: m.timestamp,
             reverse=True
         )
@@ -114,35 +178,45 @@ class AgentMemory:
         Returns:
             List of similar fixes
         """
-        # First, try to find fixes for the same rule
-        rule_fixes = self.get_memories_by_rule(rule, limit=limit)
-
-        # If we don't have enough fixes, try to find fixes with similar messages
-        if len(rule_fixes) < limit:
+        with self._lock:
             # Simple similarity: check if any words in the message match
-            message_words = set(message.lower().split())
-
-            # Get fixes that don't match the rule but have similar messages
-            similar_fixes = []
-            for memory in self.memories:
-                if memory.rule != rule and memory.success:
-                    memory_words = set(memory.message.lower().split())
-                    # Calculate word overlap
-                    overlap = len(message_words.intersection(memory_words))
-                    if overlap > 0:
-                        similar_fixes.append((memory, overlap))
-
-            # Sort by overlap (highest first)
-            similar_fixes.sort(key=lambda x: x[1], reverse=True)
-
-            # Add the most similar fixes until we reach the limit
-            for memory, _ in similar_fixes:
-                if len(rule_fixes) >= limit:
-                    break
-                if memory not in rule_fixes:
-                    rule_fixes.append(memory)
-
-        return rule_fixes
+            message_words = frozenset(message.lower().split())
+
+            # Issues of the same rule with the same message words share one lookup
+            cache_key = (rule, message_words, limit)
+            cached = self._similar_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
+            # First, try to find fixes for the same rule
+            rule_fixes = self.get_memories_by_rule(rule, limit=limit)
+
+            # If we don't have enough fixes, try to find fixes with similar messages
+            if len(rule_fixes) < limit:
+
+                # Count word overlap for the memories sharing at least one word,
+                # using the word index instead of scanning every memory
+                overlaps: Counter = Counter()
+                for word in message_words:
+                    overlaps.update(self._by_word.get(word, ()))
+
+                # Successful fixes for other rules; fixes for this rule are already included
+                candidates = (
+                    position for position in overlaps
+                    if self.memories[position].rule != rule and self.memories[position].success
+                )
+
+                # Add the most similar ones (highest overlap, oldest memory first on ties)
+                # until we reach the limit, without sorting every candidate
+                similar_positions = heapq.nsmallest(
+                    limit - len(rule_fixes),
+                    candidates,
+                    key=lambda position: (-overlaps[position], position)
+                )
+                rule_fixes.extend(self.memories[position] for position in similar_positions)
+
+            self._similar_cache[cache_key] = rule_fixes
+            return list(rule_fixes)
 
     def add_feedback(self, issue_key: str, feedback: str, success: bool = True):
         """
@@ -153,16 +227,22 @@ class AgentMemory:
             feedback: Feedback on the fix
             success: Whether the fix was successful
         """
-        for memory in self.memories:
-            if memory.issue_key == issue_key:
-                memory.feedback = feedback
-                memory.feedback_timestamp = time.time()
-                memory.success = success
-                self.save_memories()
-                logger.info(f"Added feedback to memory for issue {issue_key}")
+        with self._lock:
+            memories = self._by_issue.get(issue_key)
+            if not memories:
+                logger.warning(f"No memory found for issue {issue_key}")
                 return
 
-        logger.warning(f"No memory found for issue {issue_key}")
+            # The feedback goes to the first memory of the issue
+            memory = memories[0]
+            memory.feedback = feedback
+            memory.feedback_timestamp = time.time()
+            if memory.success != success:
+                self._rule_successful[memory.rule] += 1 if success else -1
+            memory.success = success
+            self._similar_cache.clear()
+            self.save_memories()
+            logger.info(f"Added feedback to memory for issue {issue_key}")
 
     def get_memory_stats(self) -> Dict[str, Any]:
         """
@@ -171,18 +251,13 @@ class AgentMemory:
         Returns:
             Dictionary of statistics
         """
-        total_memories = len(self.memories)
-        successful_fixes = sum(1 for m in self.memories if m.success)
-        rules = {}
-
-        for memory in self.memories:
-            rule = memory.rule
-            if rule not in rules:
-                rules[rule] = {"total": 0, "successful": 0}
-
-            rules[rule]["total"] += 1
-            if memory.success:
-                rules[rule]["successful"] += 1
+        with self._lock:
+            total_memories = len(self.memories)
+            successful_fixes = sum(self._rule_successful.values())
+            rules = {
+                rule: {"total": total, "successful": self._rule_successful[rule]}
+                for rule, total in self._rule_totals.items()
+            }
 
         return {
             "total_memories": total_memories,
@@ -0,0 +1,102 @@
+"""
+Lightweight per-stage timing metrics.
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from config import TEMP_DIR
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+METRICS_DIR = os.path.join(TEMP_DIR, "metrics")
+
+_metrics_enabled = False
+_samples: List[Tuple[str, int]] = []
+_samples_lock = threading.Lock()
+
+def set_metrics_enabled(enabled: bool):
+    """
+    Enable or disable timing metrics for this process.
+
+    Args:
+        enabled: Whether stage timings should be recorded
+    """
+    global _metrics_enabled
+    _metrics_enabled = enabled
+
+@contextmanager
+def timed(stage: str):
+    """
+    Record how long a block takes, as a context manager or decorator.
+
+    Does nothing when metrics are disabled.
+
+    Args:
+        stage: Stage name, e.g. "fix.llm_invoke"
+    """
+    if not _metrics_enabled:
+        yield
+        return
+
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter_ns() - start
+        with _samples_lock:
+            _samples.append((stage, elapsed))
+
+def get_metrics_report() -> Dict[str, Dict[str, float]]:
+    """
+    Aggregate the recorded timings by stage.
+
+    Returns:
+        Dictionary mapping each stage to its count, total and mean time in milliseconds
+    """
+    with _samples_lock:
+        samples = list(_samples)
+
+    totals: Dict[str, List[int]] = {}
+    for stage, elapsed in samples:
+        totals.setdefault(stage, []).append(elapsed)
+
+    return {
+        stage: {
+            "count": len(values),
+            "total_ms": sum(values) / 1e6,
+            "mean_ms": sum(values) / len(values) / 1e6
+        }
+        for stage, values in sorted(totals.items())
+    }
+
+def dump_metrics(directory: str = METRICS_DIR) -> Optional[str]:
+    """
+    Write the recorded timings to a JSONL file, one sample per line.
+
+    Args:
+        directory: Directory for the metrics file
+
+    Returns:
+        Path to the metrics file, or None if nothing was recorded
+    """
+    with _samples_lock:
+        samples = list(_samples)
+
+    if not samples:
+        return None
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stage, elapsed in samples:
+                f.write(json.dumps({"stage": stage, "elapsed_ns": elapsed}) + "\n")
+        logger.info(f"Wrote {len(samples)} timing samples to {path}")
+        return path
+    except OSError as e:
+        logger.error(f"Error writing metrics to {directory}: {str(e)}")
+        return None
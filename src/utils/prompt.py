@@ -0,0 +1,78 @@
+"""
+Utility for pre-compiling prompt templates.
+"""
+import re
+from itertools import chain
+from typing import Any, Tuple
+
+# Matches escaped braces and {name} placeholders in a single pass
+_PLACEHOLDER_PATTERN = re.compile(r'\{\{|\}\}|\{(\w+)\}')
+
+def compile_template(template: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Split a template into literal chunks and the variables between them.
+
+    Uses the same syntax as str.format / PromptTemplate: {name} is a variable
+    and {{ / }} are literal braces.
+
+    Args:
+        template (str): Template source
+
+    Returns:
+        tuple: Literal chunks (one more than the variables) and variable names in order
+    """
+    literals = []
+    variables = []
+    chunk = []
+    position = 0
+
+    for match in _PLACEHOLDER_PATTERN.finditer(template):
+        chunk.append(template[position:match.start()])
+        name = match.group(1)
+
+        if name is None:
+            # Escaped brace, keep a single literal brace
+            chunk.append(match.group(0)[0])
+        else:
+            literals.append(''.join(chunk))
+            variables.append(name)
+            chunk = []
+
+        position = match.end()
+
+    chunk.append(template[position:])
+    literals.append(''.join(chunk))
+
+    return tuple(literals), tuple(variables)
+
+class CompiledPrompt:
+    """
+    Prompt template compiled once into literal chunks and variable slots.
+
+    Formatting is a single join over the chunks instead of re-parsing the
+    template on every call.
+    """
+
+    __slots__ = ('literals', 'input_variables')
+
+    def __init__(self, template: str):
+        """
+        Compile the prompt template.
+
+        Args:
+            template: Template source
+        """
+        self.literals, self.input_variables = compile_template(template)
+
+    def format(self, **kwargs: Any) -> str:
+        """
+        Format the prompt.
+
+        Args:
+            **kwargs: Value for each template variable
+
+        Returns:
+            Formatted prompt
+        """
+        values = (str(kwargs[name]) for name in self.input_variables)
+        return ''.join(chain.from_iterable(zip(self.literals, values))) + self.literals[-1]
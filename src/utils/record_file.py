@@ -0,0 +1,204 @@
+"""
+Utility for storing Pydantic models in a JSON Lines file.
+"""
+import os
+import atexit
+import threading
+from itertools import chain
+from typing import Dict, Iterable, List, Tuple, Type
+from pydantic import BaseModel
+from src.utils.json_utils import loads
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Buffered records are written once this many are pending, or after the delay
+FLUSH_THRESHOLD = 32
+FLUSH_DELAY = 1.0  # seconds
+
+# Records last parsed from each file, by path, with the file version they
+# were parsed from; several managers may load the same file
+_parsed: Dict[str, Tuple[tuple, Tuple[BaseModel, ...]]] = {}
+_parsed_lock = threading.Lock()
+
+def _encode(records: Iterable[BaseModel]) -> bytes:
+    """Encode records as JSON Lines with Pydantic's serializer."""
+    return b''.join(record.model_dump_json().encode('utf-8') + b'\n' for record in records)
+
+def load_records(file_path: str, model: Type[BaseModel]) -> List[BaseModel]:
+    """
+    Load the records in a JSON Lines file.
+
+    Records parsed from a file are kept until the file changes, so loading
+    an unchanged file again only copies them.
+
+    Args:
+        file_path (str): Path to the file
+        model (Type[BaseModel]): Model of the records
+
+    Returns:
+        list: Records in file order, or an empty list if there is no file
+    """
+    try:
+        stat = os.stat(file_path)
+        version = (model, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        version = None
+
+    with _parsed_lock:
+        parsed_version, records = _parsed.get(file_path, (None, ()))
+
+    if version is None or parsed_version != version:
+        records = tuple(_read_records(file_path, model))
+        if version is not None:
+            with _parsed_lock:
+                _parsed[file_path] = (version, records)
+
+    # Each caller gets its own copies, which it may update
+    return [record.model_copy() for record in records]
+
+def _read_records(file_path: str, model: Type[BaseModel]) -> List[BaseModel]:
+    """
+    Parse the records in a JSON Lines file.
+
+    Files in the older format, a single JSON array, are rewritten as JSON
+    Lines. If a .jsonl file doesn't exist yet but the same file with a .json
+    extension does, the records are loaded from that file and written to
+    the new one, leaving the old file in place.
+
+    Args:
+        file_path (str): Path to the file
+        model (Type[BaseModel]): Model of the records
+
+    Returns:
+        list: Records in file order, or an empty list if there is no file
+    """
+    source = file_path
+    if not os.path.exists(file_path):
+        root, extension = os.path.splitext(file_path)
+        source = root + '.json'
+        if extension != '.jsonl' or not os.path.exists(source):
+            return []
+
+    with open(source, 'rb') as f:
+        first_line = f.readline()
+        legacy = first_line.lstrip()[:1] == b'['
+
+        if legacy:
+            # The old format has to be parsed as a whole
+            data = first_line + f.read()
+            records = [model.model_validate(item) for item in loads(data)]
+        else:
+            # Records are parsed line by line as the file is read
+            records = [
+                model.model_validate_json(line)
+                for line in chain([first_line], f)
+                if line.strip()
+            ]
+
+    if source != file_path or legacy:
+        write_records(file_path, records)
+
+    return records
+
+def write_records(file_path: str, records: Iterable[BaseModel]):
+    """
+    Replace the contents of a file with records, one per line.
+
+    Args:
+        file_path (str): Path to the file
+        records (Iterable[BaseModel]): Records to write
+    """
+    payload = _encode(records)
+    with open(file_path, 'wb') as f:
+        f.write(payload)
+
+def append_records(file_path: str, records: Iterable[BaseModel]):
+    """
+    Append records to a file with a single write.
+
+    Args:
+        file_path (str): Path to the file
+        records (Iterable[BaseModel]): Records to append
+    """
+    payload = _encode(records)
+    with open(file_path, 'ab') as f:
+        f.write(payload)
+
+class BufferedRecordWriter:
+    """
+    Writer that appends records to a JSON Lines file in batches.
+
+    Appended records are buffered and written together once FLUSH_THRESHOLD
+    records are pending or FLUSH_DELAY seconds after the first one, whichever
+    comes first, and when the process exits.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Initialize the writer.
+
+        Args:
+            file_path (str): Path to the file
+        """
+        self.file_path = file_path
+        self._pending: List[BaseModel] = []
+        self._timer = None
+
+        # Records may be appended from several threads at once; file writes
+        # are made while holding the lock, so they never interleave
+        self._lock = threading.Lock()
+
+        atexit.register(self.flush)
+
+    def append(self, record: BaseModel):
+        """
+        Buffer a record for appending to the file.
+
+        Args:
+            record (BaseModel): Record to append
+        """
+        with self._lock:
+            self._pending.append(record)
+
+            if len(self._pending) >= FLUSH_THRESHOLD:
+                self._write_pending()
+            elif self._timer is None:
+                self._timer = threading.Timer(FLUSH_DELAY, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write the buffered records to the file."""
+        with self._lock:
+            self._write_pending()
+
+    def rewrite(self, records: Iterable[BaseModel]):
+        """
+        Replace the contents of the file, dropping the buffered records.
+
+        Args:
+            records (Iterable[BaseModel]): Every record, including the buffered ones
+        """
+        with self._lock:
+            self._cancel_timer()
+            self._pending = []
+            write_records(self.file_path, records)
+
+    def _write_pending(self):
+        """Append the buffered records to the file; the lock must be held."""
+        self._cancel_timer()
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, []
+        try:
+            append_records(self.file_path, pending)
+        except Exception as e:
+            logger.error(f"Error writing {len(pending)} records to {self.file_path}: {str(e)}")
+
+    def _cancel_timer(self):
+        """Cancel the pending delayed flush; the lock must be held."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -1,17 +1,24 @@
 """
 Parallel processing module for handling multiple issues simultaneously.
 """
-import concurrent.futures
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, Optional, Iterable, Callable
 import os
 import time
 from pydantic import BaseModel, Field
 from src.utils.logger import setup_logger
+from src.utils.context_extractor import extract_code_context
 from src.agents.issue_analyzer import IssueAnalyzerAgent, IssueAnalysisInput, IssueAnalysisOutput
 from src.agents.code_fixer import CodeFixerAgent, CodeFixInput, CodeFixOutput
 
 logger = setup_logger()
 
+# Applies a fix to the working tree, given the analysis it was made from
+ApplyFixCallback = Callable[[IssueAnalysisOutput, CodeFixOutput], None]
+
+# Marks the end of a pipeline queue
+_DONE = object()
+
 class ParallelProcessingResult(BaseModel):
     """Result of parallel processing."""
     successful_fixes: List[CodeFixOutput] = Field(default_factory=list, description="Successfully fixed issues")
@@ -29,19 +36,50 @@ class ParallelProcessor:
         Initialize the parallel processor.
 
         Args:
-            max_workers: Maximum number of worker threads
+            max_workers: Number of concurrent workers in each pipeline stage
         """
         self.max_workers = max_workers
         self.issue_analyzer = IssueAnalyzerAgent()
         self.code_fixer = CodeFixerAgent()
 
-    def process_issues(self, issues: List[Dict[str, Any]], repo_path: str) -> ParallelProcessingResult:
+    def process_issues(
+        self,
+        issues: Iterable[Dict[str, Any]],
+        repo_path: str,
+        apply_fix: Optional[ApplyFixCallback] = None
+    ) -> ParallelProcessingResult:
         """
         Process multiple issues in parallel.
 
         Args:
-            issues: List of SonarQube issues to process
+            issues: SonarQube issues to process
             repo_path: Path to the repository
+            apply_fix: Optional callback that applies each fix as soon as it is ready
+
+        Returns:
+            Result of parallel processing
+        """
+        return asyncio.run(self.process_issues_async(issues, repo_path, apply_fix))
+
+    async def process_issues_async(
+        self,
+        issues: Iterable[Dict[str, Any]],
+        repo_path: str,
+        apply_fix: Optional[ApplyFixCallback] = None
+    ) -> ParallelProcessingResult:
+        """
+        Process multiple issues as a pipeline on the running event loop.
+
+        Issues flow through bounded queues from the producer to max_workers
+        analyzer workers, then to max_workers fixer workers, and finally to a
+        single applier. Analyzing one issue overlaps with fixing another, and
+        fixes are applied one at a time as they arrive since applying touches
+        the working tree.
+
+        Args:
+            issues: SonarQube issues to process, e.g. a generator over fetched pages
+            repo_path: Path to the repository
+            apply_fix: Optional callback that applies a fix, given its analysis
 
         Returns:
             Result of parallel processing
@@ -51,35 +89,90 @@ class ParallelProcessor:
         failed_issues = []
         processing_times = {}
 
-        logger.info(f"Processing {len(issues)} issues in parallel with {self.max_workers} workers")
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all issues for processing
-            future_to_issue = {
-                executor.submit(self._process_single_issue, issue, repo_path): issue
-                for issue in issues
-            }
-
-            # Process results as they complete
-            for future in concurrent.futures.as_completed(future_to_issue):
-                issue = future_to_issue[future]
-                issue_key = issue.get('key', 'unknown')
-
-                try:
-                    result = future.result()
-                    if result:
-                        successful_fixes.append(result)
-                        logger.info(f"Successfully fixed issue {issue_key}")
-                    else:
-                        failed_issues.append(issue)
-                        logger.warning(f"Failed to fix issue {issue_key}")
-
-                    # Record processing time
-                    processing_times[issue_key] = result.processing_time if result else 0
-
-                except Exception as e:
-                    logger.error(f"Error processing issue {issue_key}: {str(e)}")
-                    failed_issues.append(issue)
+        logger.info(f"Processing issues in a pipeline with {self.max_workers} workers per stage")
+
+        queue_size = self.max_workers * 2
+        fetched: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        analyzed: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        fixed: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+        def _fail(issue: Dict[str, Any]):
+            issue_key = issue.get('key', 'unknown')
+            failed_issues.append(issue)
+            processing_times[issue_key] = 0
+            logger.warning(f"Failed to fix issue {issue_key}")
+
+        async def _produce():
+            # Always signal the analyzers, or they would wait forever if
+            # fetching the issues fails
+            try:
+                for issue in issues:
+                    await fetched.put(issue)
+            except Exception as e:
+                logger.error(f"Error fetching issues: {str(e)}")
+            finally:
+                for _ in range(self.max_workers):
+                    await fetched.put(_DONE)
+
+        async def _analyze():
+            while True:
+                issue = await fetched.get()
+                if issue is _DONE:
+                    return
+                started_at = time.time()
+                analysis = await self._analyze_issue_async(issue, repo_path)
+                if analysis is None:
+                    _fail(issue)
+                else:
+                    await analyzed.put((issue, analysis, started_at))
+
+        async def _fix():
+            while True:
+                item = await analyzed.get()
+                if item is _DONE:
+                    return
+                issue, analysis, started_at = item
+                fix = await self._fix_issue_async(analysis)
+                if fix is None:
+                    _fail(issue)
+                else:
+                    fix.processing_time = time.time() - started_at
+                    await fixed.put((issue, analysis, fix))
+
+        async def _apply():
+            while True:
+                item = await fixed.get()
+                if item is _DONE:
+                    return
+                issue, analysis, fix = item
+
+                if apply_fix is not None:
+                    try:
+                        apply_fix(analysis, fix)
+                    except Exception as e:
+                        logger.error(f"Error applying fix for issue {fix.issue_key}: {str(e)}")
+                        _fail(issue)
+                        continue
+
+                successful_fixes.append(fix)
+                processing_times[fix.issue_key] = fix.processing_time or 0
+                logger.info(f"Successfully fixed issue {fix.issue_key}")
+
+        async def _close(workers: List[asyncio.Task], queue: asyncio.Queue, count: int):
+            # Signal the next stage once every worker of this stage has finished
+            await asyncio.gather(*workers)
+            for _ in range(count):
+                await queue.put(_DONE)
+
+        analyze_workers = [asyncio.ensure_future(_analyze()) for _ in range(self.max_workers)]
+        fix_workers = [asyncio.ensure_future(_fix()) for _ in range(self.max_workers)]
+
+        await asyncio.gather(
+            _produce(),
+            _close(analyze_workers, analyzed, self.max_workers),
+            _close(fix_workers, fixed, 1),
+            _apply()
+        )
 
         total_time = time.time() - start_time
         logger.info(f"Parallel processing completed in {total_time:.2f} seconds")
@@ -92,48 +185,56 @@ class ParallelProcessor:
             total_time=total_time
         )
 
-    def _process_single_issue(self, issue: Dict[str, Any], repo_path: str) -> Optional[CodeFixOutput]:
+    async def _analyze_issue_async(self, issue: Dict[str, Any], repo_path: str) -> Optional[IssueAnalysisOutput]:
         """
-        Process a single issue.
+        Analyze a single issue.
 
         Args:
-            issue: SonarQube issue to process
+            issue: SonarQube issue to analyze
             repo_path: Path to the repository
 
         Returns:
-            Fixed issue output if successful, None otherwise
+            Issue analysis if successful, None otherwise
         """
         issue_key = issue.get('key', 'unknown')
-        start_time = time.time()
 
         try:
             # Extract file path
-            file_path = issue['component'].split(':')[-1]
-            full_file_path = os.path.join(repo_path, file_path)
+            file_path = issue.get('_file_path') or issue['component'].rsplit(':', 1)[-1]
+            full_file_path = issue.get('_full_path') or os.path.join(repo_path, file_path)
 
-            # Skip if file doesn't exist
-            if not os.path.exists(full_file_path):
-                logger.warning(f"File not found: {file_path}. Skipping issue {issue_key}.")
+            # Extract the context here, skipping the issue if the file can't be read
+            context = extract_code_context(full_file_path, issue.get('line', 1))
+            if context is None:
+                logger.warning(f"Could not read {file_path}. Skipping issue {issue_key}.")
                 return None
 
-            # Step 1: Analyze the issue
             analysis_input = IssueAnalysisInput(
                 issue=issue,
-                file_path=full_file_path
+                file_path=full_file_path,
+                context=context
             )
 
-            analysis = self.issue_analyzer.analyze_issue(analysis_input)
+            return await self.issue_analyzer.analyze_issue_async(analysis_input)
 
-            # Step 2: Fix the issue
-            fix_input = CodeFixInput(analysis=analysis, use_memory=True)
-            fix = self.code_fixer.fix_issue(fix_input)
+        except Exception as e:
+            logger.error(f"Error analyzing issue {issue_key}: {str(e)}")
+            return None
 
-            # Add processing time to the output
-            processing_time = time.time() - start_time
-            setattr(fix, 'processing_time', processing_time)
+    async def _fix_issue_async(self, analysis: IssueAnalysisOutput) -> Optional[CodeFixOutput]:
+        """
+        Fix a single analyzed issue.
 
-            return fix
+        Args:
+            analysis: Analysis of the issue
+
+        Returns:
+            Fixed issue output if successful, None otherwise
+        """
+        try:
+            fix_input = CodeFixInput(analysis=analysis, use_memory=True)
+            return await self.code_fixer.fix_issue_async(fix_input)
 
         except Exception as e:
-            logger.error(f"Error processing issue {issue_key}: {str(e)}")
+            logger.error(f"Error fixing issue {analysis.issue_key}: {str(e)}")
             return None
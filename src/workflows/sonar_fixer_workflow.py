@@ -1,12 +1,16 @@
 """
 LangGraph workflow for the AI Sonar Issue Fixer.
 """
-from typing import Dict, List, Any, TypedDict, Optional, Annotated, Literal, Union
+from typing import Dict, List, Any, TypedDict, Optional, Annotated, Literal, Tuple, Union
 import os
 import time
-from datetime import datetime
+import asyncio
+import operator
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel, Field
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
 from git import Repo
 from src.utils.logger import setup_logger
 from src.sonarqube.issue_fetcher import SonarQubeIssueFetcher
@@ -15,13 +19,18 @@ from src.agents.issue_analyzer import IssueAnalyzerAgent, IssueAnalysisInput, Is
 from src.agents.code_fixer import CodeFixerAgent, CodeFixInput, CodeFixOutput
 from src.agents.pr_creator import PRCreatorAgent, PRCreatorInput, PRCreatorOutput
 from src.workflows.parallel_processor import ParallelProcessor
-from config import MAX_ISSUES_PER_RUN, TEMP_DIR
+from src.utils.context_extractor import extract_code_context
+from config import MAX_ISSUES_PER_RUN, TEMP_DIR, GIT_SPARSE_CHECKOUT
 
 logger = setup_logger()
 
-# Define the state for our workflow
-class WorkflowState(BaseModel):
-    """State for the AI Sonar Issue Fixer workflow."""
+def _merge_dicts(left: Dict[str, float], right: Dict[str, float]) -> Dict[str, float]:
+    """Merge the processing times reported by concurrent nodes."""
+    return {**left, **right}
+
+# Define the run for our workflow
+class WorkflowRun(BaseModel):
+    """Parameters and results of a run of the AI Sonar Issue Fixer workflow."""
     # Input parameters
     max_issues: int = Field(MAX_ISSUES_PER_RUN, description="Maximum number of issues to process")
     days_lookback: int = Field(1, description="Number of days to look back for issues")
@@ -40,11 +49,11 @@ class WorkflowState(BaseModel):
 
     # Issue state
     issues: List[Dict[str, Any]] = Field(default_factory=list, description="List of issues to fix")
-    current_issue_index: int = Field(0, description="Index of the current issue being processed")
     analyzed_issues: List[IssueAnalysisOutput] = Field(default_factory=list, description="List of analyzed issues")
     fixed_issues: List[CodeFixOutput] = Field(default_factory=list, description="List of fixed issues")
     skipped_issues: List[Dict[str, Any]] = Field(default_factory=list, description="List of skipped issues")
     processing_times: Dict[str, float] = Field(default_factory=dict, description="Processing time for each issue")
+    pending_fixes: List[Tuple[Dict[str, Any], IssueAnalysisOutput, CodeFixOutput]] = Field(default_factory=list, description="Fixes to apply and commit, as (issue, analysis, fix) tuples")
 
     # PR state
     pr_url: Optional[str] = Field(None, description="URL of the created PR")
@@ -57,14 +66,121 @@ class WorkflowState(BaseModel):
     duration_seconds: Optional[float] = Field(None, description="Duration of the run in seconds")
     parallel_processing_time: Optional[float] = Field(None, description="Time spent in parallel processing")
 
+# Define the state for our workflow; a plain dict, so the graph merges each
+# node's updates without validating the whole state again
+class WorkflowState(TypedDict, total=False):
+    """State for the AI Sonar Issue Fixer workflow; see WorkflowRun for the fields."""
+    # Input parameters
+    max_issues: int
+    days_lookback: int
+    parallel_workers: int
+    use_parallel: bool
+
+    # Workflow state
+    start_time: float
+    status: str
+    current_step: str
+    error: Optional[str]
+
+    # Repository state
+    repo_path: Optional[str]
+    branch_name: Optional[str]
+
+    # Issue state; issues are processed concurrently, so their results are
+    # combined by reducers rather than replaced
+    issues: List[Dict[str, Any]]
+    analyzed_issues: Annotated[List[IssueAnalysisOutput], operator.add]
+    fixed_issues: Annotated[List[CodeFixOutput], operator.add]
+    skipped_issues: Annotated[List[Dict[str, Any]], operator.add]
+    processing_times: Annotated[Dict[str, float], _merge_dicts]
+    pending_fixes: Annotated[List[Tuple[Dict[str, Any], IssueAnalysisOutput, CodeFixOutput]], operator.add]
+
+    # PR state
+    pr_url: Optional[str]
+    pr_title: Optional[str]
+    pr_description: Optional[str]
+
+    # Results
+    num_issues_found: int
+    num_issues_fixed: int
+    duration_seconds: Optional[float]
+    parallel_processing_time: Optional[float]
+
+class IssueTask(TypedDict):
+    """Input of the node that processes a single issue."""
+    issue: Dict[str, Any]
+
 # Define the agents
 issue_fetcher = SonarQubeIssueFetcher()
 issue_analyzer = IssueAnalyzerAgent()
 code_fixer = CodeFixerAgent()
 pr_creator = PRCreatorAgent()
 
+# Git managers by working tree, so each node reuses the opened repository
+_git_managers: Dict[str, GitRepoManager] = {}
+_git_managers_lock = threading.Lock()
+
+def _git_manager(repo_path: str) -> GitRepoManager:
+    """
+    Get the Git manager for a working tree, opening the repository on first use.
+
+    Args:
+        repo_path: Path to the working tree
+
+    Returns:
+        Git manager for the working tree
+    """
+    with _git_managers_lock:
+        git_manager = _git_managers.get(repo_path)
+        if git_manager is None:
+            git_manager = GitRepoManager()
+            git_manager.repo_path = repo_path
+            git_manager.repo = Repo(repo_path)
+            _git_managers[repo_path] = git_manager
+        return git_manager
+
+def _apply_and_commit(repo_path: str, pending_fixes: List[Tuple[Dict[str, Any], IssueAnalysisOutput, CodeFixOutput]]) -> Tuple[List[CodeFixOutput], List[Dict[str, Any]]]:
+    """
+    Apply fixes to the working tree, grouped by file, and commit them together.
+
+    Each file is written once with all of its fixes, each replacing the lines
+    it was made from, so fixes to the same file neither shift nor overwrite
+    each other.
+
+    Args:
+        repo_path: Path to the working tree
+        pending_fixes: (issue, analysis, fix) tuples
+
+    Returns:
+        Applied fixes, and the issues whose fixes could not be applied
+    """
+    by_file: Dict[str, List[Tuple[Dict[str, Any], IssueAnalysisOutput, CodeFixOutput]]] = {}
+    for issue, analysis, fix in pending_fixes:
+        by_file.setdefault(os.path.join(repo_path, fix.file_path), []).append((issue, analysis, fix))
+
+    fixed_issues = []
+    skipped_issues = []
+    pending_commits = []
+    for file_path, file_fixes in by_file.items():
+        applied = code_fixer.apply_fixes(
+            file_path,
+            [(analysis.context, fix.fixed_code) for _, analysis, fix in file_fixes]
+        )
+
+        for (issue, _, fix), success in zip(file_fixes, applied):
+            if success:
+                fixed_issues.append(fix)
+                pending_commits.append((file_path, fix.issue_key, fix.message))
+            else:
+                logger.warning(f"Could not apply fix for issue {fix.issue_key}. Skipping.")
+                skipped_issues.append(issue)
+
+    # Commit all applied fixes with a single git add and git commit
+    _git_manager(repo_path).commit_all(pending_commits)
+    return fixed_issues, skipped_issues
+
 # Define the workflow steps
-def fetch_issues(state: WorkflowState) -> WorkflowState:
+def fetch_issues(state: WorkflowState) -> Dict[str, Any]:
     """
     Fetch issues from SonarQube.
 
@@ -72,41 +188,49 @@ def fetch_issues(state: WorkflowState) -> WorkflowState:
         state: Current workflow state
 
     Returns:
-        Updated workflow state
+        Updates to the workflow state
     """
     logger.info("Fetching issues from SonarQube...")
-    state.status = "fetching_issues"
 
     try:
         # Fetch issues
         issues = issue_fetcher.fetch_new_issues(
-            max_issues=state.max_issues,
-            days=state.days_lookback
+            max_issues=state["max_issues"],
+            days=state["days_lookback"]
         )
 
-        state.issues = issues
-        state.num_issues_found = len(issues)
+        # Work out each issue's file once, for every node that needs it
+        for issue in issues:
+            issue['_file_path'] = issue['component'].rsplit(':', 1)[-1]
+
+        updates = {
+            "issues": issues,
+            "num_issues_found": len(issues)
+        }
 
         if not issues:
             logger.info("No issues found. Workflow complete.")
-            state.status = "completed"
-            state.current_step = "end"
-            state.duration_seconds = time.time() - state.start_time
+            updates.update(
+                status="completed",
+                current_step="end",
+                duration_seconds=time.time() - state["start_time"]
+            )
         else:
             logger.info(f"Found {len(issues)} issues to fix")
-            state.status = "issues_fetched"
-            state.current_step = "setup_repository"
+            updates.update(status="issues_fetched", current_step="setup_repository")
+
+        return updates
 
     except Exception as e:
         logger.error(f"Error fetching issues: {str(e)}")
-        state.status = "error"
-        state.error = f"Error fetching issues: {str(e)}"
-        state.current_step = "end"
-        state.duration_seconds = time.time() - state.start_time
-
-    return state
-
-def setup_repository(state: WorkflowState) -> WorkflowState:
+        return {
+            "status": "error",
+            "error": f"Error fetching issues: {str(e)}",
+            "current_step": "end",
+            "duration_seconds": time.time() - state["start_time"]
+        }
+
+def setup_repository(state: WorkflowState) -> Dict[str, Any]:
     """
     Set up the Git repository.
 
@@ -114,213 +238,210 @@ def setup_repository(state: WorkflowState) -> WorkflowState:
         state: Current workflow state
 
     Returns:
-        Updated workflow state
+        Updates to the workflow state
     """
     logger.info("Setting up repository...")
-    state.status = "setting_up_repository"
 
     try:
         # Generate branch name
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        branch_name = f"fix/sonar-{timestamp}"
-        state.branch_name = branch_name
+        branch_name = f"fix/sonar-{time.time_ns():x}"
 
         # Create temp directory if it doesn't exist
         os.makedirs(TEMP_DIR, exist_ok=True)
 
+        # Only the directories of the files with issues are needed in a sparse checkout
+        sparse_paths = None
+        if GIT_SPARSE_CHECKOUT:
+            sparse_paths = sorted({
+                os.path.dirname(issue['_file_path']) for issue in state["issues"]
+            } - {''})
+
         # Clone repository and create branch
         git_manager = GitRepoManager()
-        repo_path = git_manager.clone_repo()
+        repo_path = git_manager.clone_repo(sparse_paths=sparse_paths)
         git_manager.create_branch(branch_name)
 
-        state.repo_path = repo_path
-        state.status = "repository_setup"
-        state.current_step = "process_issue"
+        # Later nodes reuse the manager that cloned the repository
+        with _git_managers_lock:
+            _git_managers[repo_path] = git_manager
+
+        # Skip issues in files the repository doesn't have, e.g. since renamed
+        tracked = git_manager.tracked_files(issue['_file_path'] for issue in state["issues"])
+        skipped_issues = [issue for issue in state["issues"] if issue['_file_path'] not in tracked]
+        for issue in skipped_issues:
+            logger.warning(f"File not found: {issue['_file_path']}. Skipping issue {issue.get('key', 'unknown')}.")
+
+        # Resolve the remaining issues' files in the working tree once
+        issues = [
+            dict(issue, _full_path=os.path.join(repo_path, issue['_file_path']))
+            for issue in state["issues"]
+            if issue['_file_path'] in tracked
+        ]
+
+        return {
+            "issues": issues,
+            "skipped_issues": skipped_issues,
+            "branch_name": branch_name,
+            "repo_path": repo_path,
+            "status": "repository_setup",
+            "current_step": "process_issues"
+        }
 
     except Exception as e:
         logger.error(f"Error setting up repository: {str(e)}")
-        state.status = "error"
-        state.error = f"Error setting up repository: {str(e)}"
-        state.current_step = "end"
-        state.duration_seconds = time.time() - state.start_time
-
-    return state
-
-def process_issues_parallel(state: WorkflowState) -> WorkflowState:
+        return {
+            "status": "error",
+            "error": f"Error setting up repository: {str(e)}",
+            "current_step": "end",
+            "duration_seconds": time.time() - state["start_time"]
+        }
+
+async def process_issues_parallel(state: WorkflowState) -> Dict[str, Any]:
     """
     Process all issues in parallel.
 
+    The processor's pipeline runs on the workflow's event loop; the fixes
+    are then applied and committed in a worker thread so they don't block
+    the loop.
+
     Args:
         state: Current workflow state
 
     Returns:
-        Updated workflow state
+        Updates to the workflow state
     """
-    logger.info(f"Processing {len(state.issues)} issues in parallel with {state.parallel_workers} workers")
-    state.status = "processing_issues_parallel"
+    logger.info(f"Processing {len(state['issues'])} issues in parallel with {state['parallel_workers']} workers")
 
     try:
         # Initialize the parallel processor
-        processor = ParallelProcessor(max_workers=state.parallel_workers)
+        processor = ParallelProcessor(max_workers=state["parallel_workers"])
 
-        # Process all issues in parallel
-        start_time = time.time()
-        result = processor.process_issues(state.issues, state.repo_path)
-        state.parallel_processing_time = time.time() - start_time
+        # Fixes are collected as they are ready, and applied once every issue is processed
+        issues_by_key = {issue.get('key'): issue for issue in state["issues"]}
+        pending_fixes = []
 
-        # Update state with results
-        state.fixed_issues = result.successful_fixes
-        state.skipped_issues = result.failed_issues
-        state.processing_times = result.processing_times
+        def collect_fix(analysis: IssueAnalysisOutput, fix: CodeFixOutput):
+            pending_fixes.append((issues_by_key.get(fix.issue_key, {'key': fix.issue_key}), analysis, fix))
 
-        # Apply fixes and commit changes
-        git_manager = GitRepoManager()
-        git_manager.repo_path = state.repo_path
-        # We need to recreate the repo object from the existing path
-        git_manager.repo = Repo(state.repo_path)
-
-        for fix in state.fixed_issues:
-            try:
-                # Extract file path
-                file_path = fix.file_path
-                full_file_path = os.path.join(state.repo_path, file_path)
-
-                # Apply the fix
-                # The context might be missing in the fix object, so we need to handle that
-                context = None
-                if hasattr(fix, 'analysis'):
-                    context = fix.analysis.context
-                elif hasattr(fix, 'original_code'):
-                    # Create a simple context if we have the original code
-                    context = {
-                        'start_line': 1,
-                        'end_line': len(fix.original_code.split('\n')),
-                        'context_text': fix.original_code
-                    }
-
-                if context is None:
-                    logger.warning(f"Missing context for issue {fix.issue_key}. Cannot apply fix.")
-                    continue
-
-                success = code_fixer.apply_fix(
-                    file_path=full_file_path,
-                    context=context,
-                    fixed_code=fix.fixed_code
-                )
-
-                if success:
-                    # Commit the change
-                    commit_message = f"Fix SonarQube issue: {fix.issue_key}"
-                    git_manager.commit_changes(file_path, commit_message)
-                    logger.info(f"Committed fix for issue: {fix.issue_key}")
-            except Exception as e:
-                logger.error(f"Error applying fix for issue {fix.issue_key}: {str(e)}")
-
-        logger.info(f"Parallel processing completed: {len(state.fixed_issues)} issues fixed, {len(state.skipped_issues)} issues skipped")
-        state.status = "issues_processed"
-        state.current_step = "create_pull_request"
+        # Analyze and fix the issues as a pipeline
+        start_time = time.time()
+        result = await processor.process_issues_async(state["issues"], state["repo_path"], apply_fix=collect_fix)
+        parallel_processing_time = time.time() - start_time
+
+        fixed_issues, skipped_issues = await asyncio.get_running_loop().run_in_executor(
+            None, _apply_and_commit, state["repo_path"], pending_fixes
+        )
+        skipped_issues = result.failed_issues + skipped_issues
+
+        logger.info(f"Parallel processing completed: {len(fixed_issues)} issues fixed, {len(skipped_issues)} issues skipped")
+        return {
+            "fixed_issues": fixed_issues,
+            "skipped_issues": skipped_issues,
+            "processing_times": result.processing_times,
+            "parallel_processing_time": parallel_processing_time,
+            "status": "issues_processed",
+            "current_step": "create_pull_request"
+        }
 
     except Exception as e:
         logger.error(f"Error in parallel processing: {str(e)}")
-        state.status = "error"
-        state.error = f"Error in parallel processing: {str(e)}"
-        state.current_step = "end"
-        state.duration_seconds = time.time() - state.start_time
-
-    return state
-
-def process_issue(state: WorkflowState) -> WorkflowState:
+        return {
+            "status": "error",
+            "error": f"Error in parallel processing: {str(e)}",
+            "current_step": "end",
+            "duration_seconds": time.time() - state["start_time"]
+        }
+
+def process_one_issue(task: IssueTask) -> Dict[str, Any]:
     """
-    Process the current issue (sequential fallback).
+    Process a single issue.
+
+    One of these runs for each issue, all in the same step of the graph.
 
     Args:
-        state: Current workflow state
+        task: Issue to process, with its file resolved in the working tree
 
     Returns:
-        Updated workflow state
+        Updates to the workflow state
     """
-    # If parallel processing is enabled, use that instead
-    if state.use_parallel:
-        return process_issues_parallel(state)
-
-    # Check if we've processed all issues
-    if state.current_issue_index >= len(state.issues):
-        logger.info("All issues processed")
-        state.status = "issues_processed"
-        state.current_step = "create_pull_request"
-        return state
-
-    # Get the current issue
-    issue = state.issues[state.current_issue_index]
+    issue = task["issue"]
     issue_key = issue.get('key', 'unknown')
 
-    logger.info(f"Processing issue {state.current_issue_index + 1}/{len(state.issues)}: {issue_key}")
-    state.status = f"processing_issue_{issue_key}"
+    logger.info(f"Processing issue: {issue_key}")
 
     try:
-        # Extract file path
-        file_path = issue['component'].split(':')[-1]
-        full_file_path = os.path.join(state.repo_path, file_path)
-
-        # Skip if file doesn't exist
-        if not os.path.exists(full_file_path):
-            logger.warning(f"File not found: {file_path}. Skipping issue.")
-            state.skipped_issues.append(issue)
-            state.current_issue_index += 1
-            return state
+        file_path = issue['_file_path']
+        full_file_path = issue['_full_path']
 
         # Record start time
         start_time = time.time()
 
+        # Extract the context here, skipping the issue if the file can't be read
+        context = extract_code_context(full_file_path, issue.get('line', 1))
+        if context is None:
+            logger.warning(f"Could not read {file_path}. Skipping issue {issue_key}.")
+            return {"skipped_issues": [issue]}
+
         # Analyze the issue
         analysis_input = IssueAnalysisInput(
             issue=issue,
-            file_path=full_file_path
+            file_path=full_file_path,
+            context=context
         )
 
         analysis = issue_analyzer.analyze_issue(analysis_input)
-        state.analyzed_issues.append(analysis)
 
         # Fix the issue
         fix_input = CodeFixInput(analysis=analysis, use_memory=True)
         fix = code_fixer.fix_issue(fix_input)
 
-        # Apply the fix
-        success = code_fixer.apply_fix(
-            file_path=full_file_path,
-            context=analysis.context,
-            fixed_code=fix.fixed_code
-        )
-
         # Record processing time
         processing_time = time.time() - start_time
-        state.processing_times[issue_key] = processing_time
-
-        if success:
-            # Commit the change
-            git_manager = GitRepoManager()
-            git_manager.repo_path = state.repo_path
-            git_manager.repo = Repo(state.repo_path)
-
-            commit_message = f"Fix SonarQube issue: {issue_key}\n\n{issue['message']}"
-            git_manager.commit_changes(file_path, commit_message)
+        logger.info(f"Fixed issue: {issue_key} in {processing_time:.2f} seconds")
 
-            state.fixed_issues.append(fix)
-            logger.info(f"Successfully fixed issue: {issue_key} in {processing_time:.2f} seconds")
-        else:
-            logger.warning(f"Could not apply fix for issue {issue_key}. Skipping.")
-            state.skipped_issues.append(issue)
+        # The fix is applied with the others by commit_fixes
+        return {
+            "analyzed_issues": [analysis],
+            "pending_fixes": [(issue, analysis, fix)],
+            "processing_times": {issue_key: processing_time}
+        }
 
     except Exception as e:
         logger.error(f"Error processing issue {issue_key}: {str(e)}")
-        state.skipped_issues.append(issue)
+        return {"skipped_issues": [issue]}
 
-    # Move to the next issue
-    state.current_issue_index += 1
+def commit_fixes(state: WorkflowState) -> Dict[str, Any]:
+    """
+    Apply the fixes made by the per-issue nodes and commit them in a single commit.
+
+    Args:
+        state: Current workflow state
+
+    Returns:
+        Updates to the workflow state
+    """
+    logger.info(f"Applying {len(state['pending_fixes'])} fixes...")
+
+    try:
+        fixed_issues, skipped_issues = _apply_and_commit(state["repo_path"], state["pending_fixes"])
 
-    return state
+        return {
+            "fixed_issues": fixed_issues,
+            "skipped_issues": skipped_issues,
+            "status": "issues_processed",
+            "current_step": "create_pull_request"
+        }
 
-def create_pull_request(state: WorkflowState) -> WorkflowState:
+    except Exception as e:
+        logger.error(f"Error committing fixes: {str(e)}")
+        return {
+            "status": "error",
+            "error": f"Error committing fixes: {str(e)}",
+            "current_step": "end",
+            "duration_seconds": time.time() - state["start_time"]
+        }
+
+def create_pull_request(state: WorkflowState) -> Dict[str, Any]:
     """
     Create a pull request with the fixed issues.
 
@@ -328,78 +449,83 @@ def create_pull_request(state: WorkflowState) -> WorkflowState:
         state: Current workflow state
 
     Returns:
-        Updated workflow state
+        Updates to the workflow state
     """
     logger.info("Creating pull request...")
-    state.status = "creating_pull_request"
 
     # Check if any issues were fixed
-    if not state.fixed_issues:
+    if not state["fixed_issues"]:
         logger.info("No issues were fixed. Skipping PR creation.")
-        state.status = "completed"
-        state.current_step = "end"
-        state.duration_seconds = time.time() - state.start_time
-        return state
+        return {
+            "status": "completed",
+            "current_step": "end",
+            "duration_seconds": time.time() - state["start_time"]
+        }
 
     try:
-        # Push the branch
-        git_manager = GitRepoManager()
-        git_manager.repo_path = state.repo_path
-        git_manager.repo = Repo(state.repo_path)
+        git_manager = _git_manager(state["repo_path"])
+
+        # Push the branch in the background while the PR description is written
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            logger.info(f"Pushing branch {state['branch_name']} to remote")
+            push = executor.submit(git_manager.push_branch, state["branch_name"])
 
-        logger.info(f"Pushing branch {state.branch_name} to remote")
-        git_manager.push_branch(state.branch_name)
+            pr_title, pr_description = pr_creator.compose_description(state["fixed_issues"])
+            push.result()
 
         # Create pull request
         pr_input = PRCreatorInput(
-            fixed_issues=state.fixed_issues,
-            branch_name=state.branch_name
+            fixed_issues=state["fixed_issues"],
+            branch_name=state["branch_name"]
         )
 
-        pr_output = pr_creator.create_pull_request(pr_input)
+        pr_output = pr_creator.submit(pr_input, pr_title, pr_description)
 
-        state.pr_url = pr_output.pr_url
-        state.pr_title = pr_output.pr_title
-        state.pr_description = pr_output.pr_description
-        state.num_issues_fixed = len(state.fixed_issues)
-
-        state.status = "completed"
-        state.current_step = "end"
-        state.duration_seconds = time.time() - state.start_time
+        return {
+            "pr_url": pr_output.pr_url,
+            "pr_title": pr_output.pr_title,
+            "pr_description": pr_output.pr_description,
+            "num_issues_fixed": len(state["fixed_issues"]),
+            "status": "completed",
+            "current_step": "end",
+            "duration_seconds": time.time() - state["start_time"]
+        }
 
     except Exception as e:
         logger.error(f"Error creating pull request: {str(e)}")
-        state.status = "error"
-        state.error = f"Error creating pull request: {str(e)}"
-        state.current_step = "end"
-        state.duration_seconds = time.time() - state.start_time
-
-    return state
-
-def cleanup(state: WorkflowState) -> WorkflowState:
+        return {
+            "status": "error",
+            "error": f"Error creating pull request: {str(e)}",
+            "current_step": "end",
+            "duration_seconds": time.time() - state["start_time"]
+        }
+
+def cleanup(repo_path: Optional[str]):
     """
     Clean up resources.
 
-    Args:
-        state: Current workflow state
+    Runs after the workflow, so callers get the results without waiting for
+    the working tree to be deleted.
 
-    Returns:
-        Updated workflow state
+    Args:
+        repo_path: Path to the working tree, if one was set up
     """
     logger.info("Cleaning up resources...")
 
     try:
         # Clean up Git repository
-        if state.repo_path:
-            git_manager = GitRepoManager()
-            git_manager.repo_path = state.repo_path
+        if repo_path:
+            with _git_managers_lock:
+                git_manager = _git_managers.pop(repo_path, None)
+
+            if git_manager is None:
+                git_manager = GitRepoManager()
+                git_manager.repo_path = repo_path
             git_manager.cleanup()
 
     except Exception as e:
         logger.error(f"Error during cleanup: {str(e)}")
 
-    return state
-
 # Define the workflow router
 def router(state: WorkflowState) -> str:
     """
@@ -411,9 +537,38 @@ def router(state: WorkflowState) -> str:
     Returns:
         Next step name
     """
-    if state.current_step == "end":
+    if state["current_step"] == "end":
         return END
-    return state.current_step
+    return state["current_step"]
+
+def dispatch_issues(state: WorkflowState) -> Union[str, List[Send]]:
+    """
+    Route the workflow from the repository setup to issue processing.
+
+    Without parallel processing, each issue is sent to its own
+    process_one_issue node; the graph runs them concurrently and then
+    commits their fixes together.
+
+    Args:
+        state: Current workflow state
+
+    Returns:
+        Next step name, or one Send per issue
+    """
+    if state["current_step"] != "process_issues":
+        return router(state)
+
+    if state["use_parallel"]:
+        return "process_issues_parallel"
+
+    # Every issue may have been skipped during setup
+    if not state["issues"]:
+        return "create_pull_request"
+
+    return [
+        Send("process_one_issue", {"issue": issue})
+        for issue in state["issues"]
+    ]
 
 # Create the workflow graph
 def create_workflow_graph() -> StateGraph:
@@ -429,27 +584,23 @@ def create_workflow_graph() -> StateGraph:
     # Add nodes
     workflow.add_node("fetch_issues", fetch_issues)
     workflow.add_node("setup_repository", setup_repository)
-    workflow.add_node("process_issue", process_issue)
+    workflow.add_node("process_issues_parallel", process_issues_parallel)
+    workflow.add_node("process_one_issue", process_one_issue)
+    # Deferred, so it runs once every process_one_issue branch has finished
+    workflow.add_node("commit_fixes", commit_fixes, defer=True)
     workflow.add_node("create_pull_request", create_pull_request)
-    workflow.add_node("cleanup", cleanup)
 
     # Add edges
-    workflow.add_edge("fetch_issues", "setup_repository")
-    workflow.add_edge("setup_repository", "process_issue")
-    workflow.add_edge("process_issue", "process_issue")
-    workflow.add_edge("process_issue", "create_pull_request")
-    workflow.add_edge("create_pull_request", "cleanup")
-    workflow.add_edge("cleanup", END)
+    workflow.add_conditional_edges("fetch_issues", router)
+    workflow.add_conditional_edges("setup_repository", dispatch_issues)
+    workflow.add_conditional_edges("process_issues_parallel", router)
+    workflow.add_edge("process_one_issue", "commit_fixes")
+    workflow.add_conditional_edges("commit_fixes", router)
+    workflow.add_edge("create_pull_request", END)
 
     # Set the entry point
     workflow.set_entry_point("fetch_issues")
 
-    # Set the router
-    workflow.set_conditional_edges(
-        "process_issue",
-        lambda state: "create_pull_request" if state.current_issue_index >= len(state.issues) else "process_issue"
-    )
-
     return workflow
 
 # Create a compiled version of the workflow
@@ -457,7 +608,7 @@ sonar_fixer_workflow = create_workflow_graph().compile()
 
 # Function to run the workflow
 def run_workflow(max_issues: int = MAX_ISSUES_PER_RUN, days_lookback: int = 1,
-                parallel_workers: int = 5, use_parallel: bool = True) -> WorkflowState:
+                parallel_workers: int = 5, use_parallel: bool = True) -> WorkflowRun:
     """
     Run the AI Sonar Issue Fixer workflow.
 
@@ -468,21 +619,32 @@ def run_workflow(max_issues: int = MAX_ISSUES_PER_RUN, days_lookback: int = 1,
         use_parallel: Whether to use parallel processing
 
     Returns:
-        Final workflow state
+        Final workflow run
     """
-    # Create initial state
-    initial_state = WorkflowState(
+    # Create initial state, with the defaults of every field
+    initial_state = WorkflowRun(
         max_issues=max_issues,
         days_lookback=days_lookback,
         parallel_workers=parallel_workers,
         use_parallel=use_parallel
-    )
+    ).model_dump()
 
     # Run the workflow
     logger.info(f"Starting AI Sonar Issue Fixer workflow with max_issues={max_issues}, "
                f"days_lookback={days_lookback}, parallel_workers={parallel_workers}, "
                f"use_parallel={use_parallel}")
-    final_state = sonar_fixer_workflow.invoke(initial_state)
+    # Bound the number of issues processed at once, and so the concurrent LLM
+    # calls; synchronous nodes run in worker threads, async ones on the loop
+    result = asyncio.run(sonar_fixer_workflow.ainvoke(
+        initial_state,
+        config={"max_concurrency": parallel_workers}
+    ))
+
+    final_state = WorkflowRun(**result)
+
+    # Remove the working tree in the background; the interpreter still waits
+    # for it on exit, so nothing is left behind
+    threading.Thread(target=cleanup, args=(final_state.repo_path,), name="workflow-cleanup").start()
 
     # Log results
     if final_state.status == "completed":
@@ -0,0 +1,103 @@
+"""
+Tests for the orchestrator agent.
+"""
+from unittest import mock
+
+from src.agents import orchestrator
+from src.agents.code_fixer import CodeFixerAgent, CodeFixOutput
+from src.agents.issue_analyzer import IssueAnalysisOutput
+from src.agents.orchestrator import OrchestratorAgent, OrchestratorInput
+
+def _issue(key, file_path, line):
+    """Build a SonarQube issue."""
+    return {
+        "key": key,
+        "rule": "python:S1481",
+        "component": f"project:{file_path}",
+        "line": line,
+        "message": f"Remove the unused local variable in {key}."
+    }
+
+def _analysis(issue, file_path):
+    """Build the analysis of an issue."""
+    return IssueAnalysisOutput(
+        issue_key=issue["key"],
+        rule=issue["rule"],
+        message=issue["message"],
+        file_path=file_path,
+        line_number=issue["line"],
+        context={"context_text": "x = 1", "start_line": issue["line"], "end_line": issue["line"]},
+        analysis="The variable is never used.",
+        fix_strategy="Remove the variable.",
+        complexity="low"
+    )
+
+def _fix(analysis):
+    """Build a fix for an analyzed issue."""
+    return CodeFixOutput(
+        issue_key=analysis.issue_key,
+        rule=analysis.rule,
+        message=analysis.message,
+        file_path=analysis.file_path,
+        fixed_code="pass",
+        explanation="Removed the unused variable.",
+        confidence=0.9
+    )
+
+def test_failing_batch_does_not_abort_the_run():
+    """A failing LLM call only drops the fixes of the issues it could not fix."""
+    issues = [
+        _issue("A-1", "pkg/a.py", 3),
+        _issue("B-1", "b.py", 5),
+        _issue("B-2", "b.py", 9)
+    ]
+    file_paths = {"A-1": "pkg/a.py", "B-1": "b.py", "B-2": "b.py"}
+
+    def fix_single(input_data):
+        if input_data.analysis.file_path == "b.py":
+            raise RuntimeError("429 quota")
+        return _fix(input_data.analysis)
+
+    def fix_group(label, group):
+        raise RuntimeError("429 quota")
+
+    # The agents are built without their constructors, which need API credentials
+    code_fixer = CodeFixerAgent.__new__(CodeFixerAgent)
+    code_fixer._fix_single = mock.Mock(side_effect=fix_single)
+    code_fixer._fix_group = mock.Mock(side_effect=fix_group)
+    code_fixer.apply_fixes = mock.Mock(side_effect=lambda file_path, fixes: [True] * len(fixes))
+
+    agent = OrchestratorAgent.__new__(OrchestratorAgent)
+    agent.issue_fetcher = mock.Mock()
+    agent.issue_fetcher.iter_new_issues.return_value = iter(issues)
+    agent.git_manager = None
+    agent.code_fixer = code_fixer
+    agent.pr_creator = mock.Mock()
+    agent.pr_creator.create_pull_request.return_value.pr_url = "https://example.com/pr/1"
+    agent._list_repo_files = mock.Mock(return_value={"pkg/a.py", "b.py"})
+    agent._analyze_issue = mock.Mock(
+        side_effect=lambda issue, repo_path, existing_files: (
+            file_paths[issue["key"]],
+            _analysis(issue, file_paths[issue["key"]])
+        )
+    )
+
+    git_manager = mock.Mock()
+    git_manager.clone_repo.return_value = "/tmp/repo"
+    with mock.patch.object(orchestrator, "GitRepoManager", return_value=git_manager), \
+            mock.patch.object(orchestrator, "ONE_COMMIT_PER_ISSUE", False):
+        output = agent.run(OrchestratorInput(max_issues=10))
+
+    assert output.num_issues_found == 3
+    assert output.num_issues_fixed == 1
+    assert output.pr_url == "https://example.com/pr/1"
+
+    # Only the fix to pkg/a.py was applied and committed
+    code_fixer.apply_fixes.assert_called_once()
+    assert code_fixer.apply_fixes.call_args[0][0] == "/tmp/repo/pkg/a.py"
+    git_manager.commit_all.assert_called_once()
+    assert [key for _, key, _ in git_manager.commit_all.call_args[0][0]] == ["A-1"]
+    git_manager.push_branch.assert_called_once()
+
+    pr_input = agent.pr_creator.create_pull_request.call_args[0][0]
+    assert [fix.issue_key for fix in pr_input.fixed_issues] == ["A-1"]